@@ -0,0 +1,26 @@
+"""Drop idx_sales_square_id
+
+Revision ID: 03d0d1650e94
+Revises: 367e48d187f3
+Create Date: 2026-10-16
+
+uq_sales_square_id_date (square_transaction_id, transaction_date) leads
+with square_transaction_id, so it already serves the sync's duplicate
+lookups by Square order id; the single-column index only added write cost.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '03d0d1650e94'
+down_revision = '367e48d187f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_sales_square_id")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS idx_sales_square_id ON sales_transactions (square_transaction_id)")
@@ -0,0 +1,35 @@
+"""Make idx_daily_summary_loc_date a covering index
+
+Revision ID: 0f4ab2e92efd
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-16
+
+(location_id, date) lookups are already served by the
+uq_daily_summary_location_date unique index, so the plain duplicate is
+rebuilt with INCLUDE columns that let the dashboard / budget aggregations
+run as index-only scans.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '0f4ab2e92efd'
+down_revision = 'd4e5f6a7b8c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_daily_summary_loc_date")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_daily_summary_loc_date "
+            "ON daily_sales_summary (location_id, date) "
+            "INCLUDE (total_sales, total_gross, total_tax, total_refund_amount, transaction_count, currency)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_daily_summary_loc_date")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_daily_summary_loc_date ON daily_sales_summary (location_id, date)")
@@ -0,0 +1,34 @@
+"""Replace idx_sales_status with a partial index on COMPLETED sales
+
+Revision ID: 17effef84564
+Revises: a63f6c76456e
+Create Date: 2026-10-16
+
+Reporting only ever filters payment_status to the literal 'COMPLETED'
+(the transactions list takes an arbitrary status, but always together
+with location and date filters). A full btree over a handful of status
+values is large and rarely selective, so it is replaced by a partial
+(location_id, transaction_date) index over completed sales only.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '17effef84564'
+down_revision = 'a63f6c76456e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_sales_status")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sales_status_completed "
+        "ON sales_transactions (location_id, transaction_date) "
+        "WHERE payment_status = 'COMPLETED'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_sales_status_completed")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_sales_status ON sales_transactions (payment_status)")
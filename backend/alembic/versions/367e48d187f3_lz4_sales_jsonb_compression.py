@@ -0,0 +1,47 @@
+"""Compress sales_transactions JSONB payloads with LZ4
+
+Revision ID: 367e48d187f3
+Revises: 17effef84564
+Create Date: 2026-10-16
+
+The bulk of each sales row is the raw_data / line_items JSONB, which is
+TOASTed. LZ4 compresses and, more importantly, decompresses much faster
+than the default pglz, which the report scans that read line_items pay for
+on every row. Only newly written values use the new method; existing rows
+keep pglz until they are rewritten.
+
+Servers built without LZ4 support keep pglz (the migration only logs a
+notice).
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '367e48d187f3'
+down_revision = '17effef84564'
+branch_labels = None
+depends_on = None
+
+
+JSONB_COLUMNS = ('raw_data', 'line_items', 'product_categories')
+
+
+def _set_compression(method: str) -> None:
+    alters = ", ".join(f"ALTER COLUMN {col} SET COMPRESSION {method}" for col in JSONB_COLUMNS)
+    op.execute(f"""
+        DO $$
+        BEGIN
+            ALTER TABLE sales_transactions {alters};
+        EXCEPTION WHEN feature_not_supported OR invalid_parameter_value THEN
+            RAISE NOTICE 'sales_transactions: {method} compression not supported, leaving columns unchanged';
+        END
+        $$
+    """)
+
+
+def upgrade() -> None:
+    _set_compression('lz4')
+
+
+def downgrade() -> None:
+    _set_compression('pglz')
@@ -0,0 +1,191 @@
+"""Partition sales_transactions by month of transaction_date
+
+Revision ID: 3d0cf7a196c5
+Revises: 44a94db589bf
+Create Date: 2026-10-16
+
+Converts sales_transactions into a RANGE-partitioned table with one
+partition per calendar month (sales_transactions_yYYYYmMM, UTC bounds)
+plus a DEFAULT partition as a safety net, so date-bounded reports only
+touch the months they ask for.
+
+Partitioned tables require the partition key in every unique constraint,
+so the primary key becomes (id, transaction_date) and the Square id
+uniqueness becomes (square_transaction_id, transaction_date); an order's
+created_at never changes, so duplicates are still rejected.
+
+New months are created on demand by the ensure_sales_partition(ts)
+function, which the sync task calls before inserting an order. It is safe
+to call concurrently and moves any rows the DEFAULT partition already
+holds for that month into the new partition.
+
+The existing rows are copied across inside the migration, which holds
+an exclusive lock on sales_transactions for the duration of the copy.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '3d0cf7a196c5'
+down_revision = '44a94db589bf'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = """
+    id, location_id, square_transaction_id, transaction_date,
+    amount_money_amount, amount_money_currency, amount_money_usd_equivalent,
+    total_money_amount, total_money_currency,
+    total_discount_amount, total_tax_amount, total_tip_amount,
+    tender_type, payment_status, card_brand, last_4,
+    product_categories, line_items, customer_id, raw_data,
+    created_at, updated_at
+"""
+
+TABLE_BODY = """
+    id UUID NOT NULL,
+    location_id UUID NOT NULL,
+    square_transaction_id VARCHAR NOT NULL,
+    transaction_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    amount_money_amount BIGINT NOT NULL,
+    amount_money_currency VARCHAR NOT NULL,
+    amount_money_usd_equivalent BIGINT,
+    total_money_amount BIGINT NOT NULL,
+    total_money_currency VARCHAR NOT NULL,
+    total_discount_amount BIGINT DEFAULT '0' NOT NULL,
+    total_tax_amount BIGINT DEFAULT '0' NOT NULL,
+    total_tip_amount BIGINT DEFAULT '0' NOT NULL,
+    tender_type VARCHAR,
+    payment_status VARCHAR NOT NULL,
+    card_brand VARCHAR,
+    last_4 VARCHAR,
+    product_categories JSONB,
+    line_items JSONB,
+    customer_id VARCHAR,
+    raw_data JSONB NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    FOREIGN KEY(location_id) REFERENCES locations (id) ON DELETE CASCADE
+"""
+
+INDEXES = [
+    "CREATE INDEX idx_sales_location_date ON sales_transactions (location_id, transaction_date)",
+    "CREATE INDEX idx_sales_square_id ON sales_transactions (square_transaction_id)",
+    "CREATE INDEX idx_sales_date ON sales_transactions (transaction_date)",
+    "CREATE INDEX idx_sales_status ON sales_transactions (payment_status)",
+    "CREATE INDEX idx_sales_currency ON sales_transactions (amount_money_currency)",
+    "CREATE INDEX idx_sales_loc_status_date ON sales_transactions (location_id, payment_status, transaction_date)",
+]
+
+INDEX_NAMES = [
+    'idx_sales_location_date',
+    'idx_sales_square_id',
+    'idx_sales_date',
+    'idx_sales_status',
+    'idx_sales_currency',
+    'idx_sales_loc_status_date',
+]
+
+
+def upgrade() -> None:
+    # Move the old table (and the globally-named objects it owns) aside
+    op.execute("ALTER TABLE sales_transactions RENAME TO sales_transactions_legacy")
+    op.execute("ALTER TABLE sales_transactions_legacy RENAME CONSTRAINT sales_transactions_pkey TO sales_transactions_legacy_pkey")
+    op.execute(
+        "ALTER TABLE sales_transactions_legacy RENAME CONSTRAINT "
+        "sales_transactions_square_transaction_id_key TO sales_transactions_legacy_square_transaction_id_key"
+    )
+    for name in INDEX_NAMES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute(f"""
+        CREATE TABLE sales_transactions (
+            {TABLE_BODY},
+            CONSTRAINT sales_transactions_pkey PRIMARY KEY (id, transaction_date),
+            CONSTRAINT uq_sales_square_id_date UNIQUE (square_transaction_id, transaction_date)
+        ) PARTITION BY RANGE (transaction_date)
+    """)
+    op.execute("CREATE TABLE sales_transactions_default PARTITION OF sales_transactions DEFAULT")
+
+    # Creates the monthly partition holding ts (UTC month bounds) if missing.
+    # A per-month advisory lock serialises workers racing to create the same
+    # month. Rows that already landed in the DEFAULT partition for that month
+    # would make a plain CREATE ... PARTITION OF fail, so the partition is
+    # built standalone, those rows are moved into it, and it is then attached.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION ensure_sales_partition(ts TIMESTAMPTZ) RETURNS VOID AS $$
+        DECLARE
+            month_start TIMESTAMP := date_trunc('month', ts AT TIME ZONE 'UTC');
+            part_name TEXT := 'sales_transactions_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM');
+            lower_bound TIMESTAMPTZ := month_start AT TIME ZONE 'UTC';
+            upper_bound TIMESTAMPTZ := (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC';
+        BEGIN
+            IF to_regclass(part_name) IS NOT NULL THEN
+                RETURN;
+            END IF;
+            PERFORM pg_advisory_xact_lock(hashtext(part_name));
+            IF to_regclass(part_name) IS NOT NULL THEN
+                RETURN;
+            END IF;
+
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE sales_transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS '
+                'INCLUDING STORAGE INCLUDING COMPRESSION)',
+                part_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM sales_transactions_default '
+                'WHERE transaction_date >= %L AND transaction_date < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                lower_bound, upper_bound, part_name
+            );
+            EXECUTE format(
+                'ALTER TABLE sales_transactions ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                part_name, lower_bound, upper_bound
+            );
+        EXCEPTION WHEN duplicate_table THEN
+            -- Created by a session that didn't take the lock (e.g. by hand)
+            NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # One partition per month from the oldest transaction to three months ahead
+    op.execute("""
+        SELECT ensure_sales_partition(m AT TIME ZONE 'UTC')
+        FROM generate_series(
+            date_trunc('month', COALESCE((SELECT min(transaction_date) FROM sales_transactions_legacy), now()) AT TIME ZONE 'UTC'),
+            date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '3 months',
+            INTERVAL '1 month'
+        ) AS m
+    """)
+
+    # Copy rows before building indexes so each index is built in one pass
+    op.execute(f"INSERT INTO sales_transactions ({COLUMNS}) SELECT {COLUMNS} FROM sales_transactions_legacy")
+    op.execute("DROP TABLE sales_transactions_legacy")
+
+    # Indexes on the parent cascade to every current and future partition
+    for ddl in INDEXES:
+        op.execute(ddl)
+    op.execute("ANALYZE sales_transactions")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE sales_transactions RENAME TO sales_transactions_partitioned")
+    op.execute("ALTER TABLE sales_transactions_partitioned RENAME CONSTRAINT sales_transactions_pkey TO sales_transactions_partitioned_pkey")
+    for name in INDEX_NAMES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute(f"""
+        CREATE TABLE sales_transactions (
+            {TABLE_BODY},
+            PRIMARY KEY (id),
+            UNIQUE (square_transaction_id)
+        )
+    """)
+    op.execute(f"INSERT INTO sales_transactions ({COLUMNS}) SELECT {COLUMNS} FROM sales_transactions_partitioned")
+    op.execute("DROP TABLE sales_transactions_partitioned CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS ensure_sales_partition(TIMESTAMPTZ)")
+
+    for ddl in INDEXES:
+        op.execute(ddl)
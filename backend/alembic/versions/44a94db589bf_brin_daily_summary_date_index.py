@@ -0,0 +1,34 @@
+"""Use a BRIN index for daily_sales_summary.date
+
+Revision ID: 44a94db589bf
+Revises: 0f4ab2e92efd
+Create Date: 2026-10-16
+
+Summary rows are mostly appended as each trading day is synced, so the
+physical order of the table broadly tracks the date column and a BRIN
+index serves cross-location date-range scans at a fraction of the btree
+size. Per-location lookups keep using idx_daily_summary_loc_date.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '44a94db589bf'
+down_revision = '0f4ab2e92efd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_daily_summary_date")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_daily_summary_date "
+            "ON daily_sales_summary USING BRIN (date) WITH (pages_per_range = 32)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_daily_summary_date")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_daily_summary_date ON daily_sales_summary (date)")
@@ -0,0 +1,29 @@
+"""Extend idx_budgets_location_date with id for keyset pagination
+
+Revision ID: 56c454df9caa
+Revises: 71bb7f805c63
+Create Date: 2026-10-16
+
+The budgets list pages on (date, id) descending. Adding id as a trailing
+key lets per-location pages seek straight to the cursor position; the
+index still serves the existing (location_id, date) lookups, and btrees
+scan backwards, so no DESC ordering is needed.
+"""
+from app.utils.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers
+revision = '56c454df9caa'
+down_revision = '71bb7f805c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    drop_index_concurrently('idx_budgets_location_date')
+    create_index_concurrently('idx_budgets_location_date', 'budgets', ['location_id', 'date', 'id'])
+
+
+def downgrade() -> None:
+    drop_index_concurrently('idx_budgets_location_date')
+    create_index_concurrently('idx_budgets_location_date', 'budgets', ['location_id', 'date'])
@@ -0,0 +1,28 @@
+"""Add idx_budgets_date_loc on budgets (date, location_id)
+
+Revision ID: 711cc24ab906
+Revises: 56c454df9caa
+Create Date: 2026-10-16
+
+Admin-scoped budget reads cover every location in the organisation and
+are bounded and ordered by date, which the location-leading indexes
+cannot serve without touching every location. The uniqueness on
+(location_id, date, budget_type) that the upload upsert relies on already
+exists as uq_location_date_type.
+"""
+from app.utils.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers
+revision = '711cc24ab906'
+down_revision = '56c454df9caa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently('idx_budgets_date_loc', 'budgets', ['date', 'location_id'])
+
+
+def downgrade() -> None:
+    drop_index_concurrently('idx_budgets_date_loc')
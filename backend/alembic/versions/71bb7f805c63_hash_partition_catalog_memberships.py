@@ -0,0 +1,113 @@
+"""Hash-partition catalog_item_category_memberships by catalog_object_id
+
+Revision ID: 71bb7f805c63
+Revises: 781b7fe58fff
+Create Date: 2026-10-16
+
+Splits catalog_item_category_memberships into 8 HASH partitions on
+catalog_object_id. Per-item lookups prune to a single partition, and the
+category resolution in recompute_client_mappings can scan the partitions
+in parallel. Partition-wise joins (enable_partitionwise_join /
+enable_partitionwise_aggregate) only apply when the other side of the
+join is partitioned the same way, so those settings are left at their
+defaults here.
+
+The partition key must be part of every unique constraint, so the primary
+key becomes (id, catalog_object_id); uq_item_cat_membership already
+includes catalog_object_id and is unchanged.
+
+The existing rows are copied across inside the migration, which holds an
+exclusive lock on the table for the duration of the copy.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '71bb7f805c63'
+down_revision = '781b7fe58fff'
+branch_labels = None
+depends_on = None
+
+
+PARTITIONS = 8
+
+COLUMNS = "id, square_account_id, catalog_object_id, item_id, category_id"
+
+TABLE_BODY = """
+    id UUID DEFAULT gen_random_uuid() NOT NULL,
+    square_account_id UUID NOT NULL,
+    catalog_object_id VARCHAR NOT NULL,
+    item_id VARCHAR NOT NULL,
+    category_id VARCHAR NOT NULL,
+    FOREIGN KEY(square_account_id) REFERENCES square_accounts (id) ON DELETE CASCADE
+"""
+
+INDEXES = [
+    "CREATE INDEX idx_cat_membership_obj ON catalog_item_category_memberships (catalog_object_id)",
+    "CREATE INDEX idx_cat_membership_cat ON catalog_item_category_memberships (category_id)",
+]
+
+INDEX_NAMES = ['idx_cat_membership_obj', 'idx_cat_membership_cat']
+
+
+def _move_aside(suffix: str) -> None:
+    # Free the globally-named constraints and indexes for the new table
+    op.execute(f"ALTER TABLE catalog_item_category_memberships RENAME TO catalog_item_category_memberships_{suffix}")
+    op.execute(
+        f"ALTER TABLE catalog_item_category_memberships_{suffix} RENAME CONSTRAINT "
+        f"catalog_item_category_memberships_pkey TO catalog_item_category_memberships_{suffix}_pkey"
+    )
+    op.execute(
+        f"ALTER TABLE catalog_item_category_memberships_{suffix} RENAME CONSTRAINT "
+        f"uq_item_cat_membership TO uq_item_cat_membership_{suffix}"
+    )
+    for name in INDEX_NAMES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    _move_aside('legacy')
+
+    op.execute(f"""
+        CREATE TABLE catalog_item_category_memberships (
+            {TABLE_BODY},
+            CONSTRAINT catalog_item_category_memberships_pkey PRIMARY KEY (id, catalog_object_id),
+            CONSTRAINT uq_item_cat_membership UNIQUE (square_account_id, catalog_object_id, category_id)
+        ) PARTITION BY HASH (catalog_object_id)
+    """)
+    for i in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE catalog_item_category_memberships_p{i} PARTITION OF catalog_item_category_memberships "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i})"
+        )
+
+    # Copy rows before building indexes so each index is built in one pass
+    op.execute(
+        f"INSERT INTO catalog_item_category_memberships ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM catalog_item_category_memberships_legacy"
+    )
+    op.execute("DROP TABLE catalog_item_category_memberships_legacy")
+
+    for ddl in INDEXES:
+        op.execute(ddl)
+    op.execute("ANALYZE catalog_item_category_memberships")
+
+
+def downgrade() -> None:
+    _move_aside('partitioned')
+
+    op.execute(f"""
+        CREATE TABLE catalog_item_category_memberships (
+            {TABLE_BODY},
+            PRIMARY KEY (id),
+            CONSTRAINT uq_item_cat_membership UNIQUE (square_account_id, catalog_object_id, category_id)
+        )
+    """)
+    op.execute(
+        f"INSERT INTO catalog_item_category_memberships ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM catalog_item_category_memberships_partitioned"
+    )
+    op.execute("DROP TABLE catalog_item_category_memberships_partitioned CASCADE")
+
+    for ddl in INDEXES:
+        op.execute(ddl)
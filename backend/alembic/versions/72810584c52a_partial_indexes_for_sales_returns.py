@@ -0,0 +1,48 @@
+"""Add partial indexes for sales with returns / refunds in raw_data
+
+Revision ID: 72810584c52a
+Revises: 9e73faa2e974
+Create Date: 2026-10-16
+
+The refund and return reports filter sales_transactions on a scalar
+derived from raw_data:
+    jsonb_array_length(coalesce(raw_data->'returns', '[]'::jsonb)) > 0
+(and the same for 'refunds'). ->/->> lookups can't use a GIN index, and
+only a small fraction of orders have returns, so rather than a full-table
+expression btree each path gets a btree on (location_id, transaction_date)
+restricted to the matching rows. Queries must repeat the predicate
+exactly (see _has_jsonb_entries in app/api/v1/sales.py) for the planner
+to pick these up.
+
+Index flavours on sales_transactions JSONB columns:
+  - idx_sales_line_items_gin / idx_sales_product_categories_gin
+    (GIN jsonb_path_ops): @>, @?, @@ containment / path matches
+  - idx_sales_with_returns / idx_sales_with_refunds (partial btree):
+    the raw_data returns / refunds predicates above
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '72810584c52a'
+down_revision = '9e73faa2e974'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sales_with_returns "
+        "ON sales_transactions (location_id, transaction_date) "
+        "WHERE jsonb_array_length(coalesce(raw_data->'returns', '[]'::jsonb)) > 0"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sales_with_refunds "
+        "ON sales_transactions (location_id, transaction_date) "
+        "WHERE jsonb_array_length(coalesce(raw_data->'refunds', '[]'::jsonb)) > 0"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_sales_with_refunds")
+    op.execute("DROP INDEX IF EXISTS idx_sales_with_returns")
@@ -0,0 +1,33 @@
+"""Generate catalog table ids with gen_random_uuid()
+
+Revision ID: 781b7fe58fff
+Revises: ee0cd31a6bb3
+Create Date: 2026-10-16
+
+catalog_categories, catalog_item_category_memberships and
+client_catalog_mappings were created without a server-side id default,
+unlike role_permissions / footfall_entries, so every insert had to send a
+client-generated UUID and set-based INSERT ... SELECT statements had to
+spell out gen_random_uuid() themselves.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '781b7fe58fff'
+down_revision = 'ee0cd31a6bb3'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('catalog_categories', 'catalog_item_category_memberships', 'client_catalog_mappings')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT gen_random_uuid()")
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
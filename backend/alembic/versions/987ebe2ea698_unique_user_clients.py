@@ -0,0 +1,34 @@
+"""Add uq_user_clients_user_client on user_clients (user_id, client_id)
+
+Revision ID: 987ebe2ea698
+Revises: ac655be01bda
+Create Date: 2026-10-16
+
+user_clients had no uniqueness on (user_id, client_id), so a re-run of the
+b1c2d3e4f5a6 backfill or a repeated assignment could leave duplicate rows.
+Duplicates are removed first (keeping the earliest row per pair), then the
+constraint is added; the user endpoints already de-duplicate client_ids.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '987ebe2ea698'
+down_revision = 'ac655be01bda'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM user_clients uc
+        USING user_clients keep
+        WHERE uc.user_id = keep.user_id
+          AND uc.client_id = keep.client_id
+          AND (uc.created_at, uc.id) > (keep.created_at, keep.id)
+    """)
+    op.create_unique_constraint('uq_user_clients_user_client', 'user_clients', ['user_id', 'client_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_user_clients_user_client', 'user_clients', type_='unique')
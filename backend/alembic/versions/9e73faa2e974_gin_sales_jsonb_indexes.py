@@ -0,0 +1,37 @@
+"""Add GIN (jsonb_path_ops) indexes on sales_transactions JSONB columns
+
+Revision ID: 9e73faa2e974
+Revises: 2e658407fa36
+Create Date: 2026-10-16
+
+Category-filtered reports match transactions whose line_items contain a
+given catalog_object_id. jsonb_path_ops indexes are much smaller than the
+default jsonb_ops but only serve the @>, @? and @@ operators, so filters
+must be written as containment, e.g.
+    line_items @> '[{"catalog_object_id": "..."}]'
+and not line_items->... / ->> lookups (those need an expression btree).
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '9e73faa2e974'
+down_revision = '2e658407fa36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sales_line_items_gin "
+        "ON sales_transactions USING GIN (line_items jsonb_path_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sales_product_categories_gin "
+        "ON sales_transactions USING GIN (product_categories jsonb_path_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_sales_product_categories_gin")
+    op.execute("DROP INDEX IF EXISTS idx_sales_line_items_gin")
@@ -18,11 +18,14 @@ depends_on = None
 
 def upgrade():
     # Add new enum values to userrole type
-    # PostgreSQL requires adding values one at a time outside a transaction
-    op.execute("ALTER TYPE userrole ADD VALUE IF NOT EXISTS 'store_manager'")
-    op.execute("ALTER TYPE userrole ADD VALUE IF NOT EXISTS 'reporting'")
-
-    # Add client_id column to users table
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block, so both
+    # values are added together in a single autocommit block
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE userrole ADD VALUE IF NOT EXISTS 'store_manager'")
+        op.execute("ALTER TYPE userrole ADD VALUE IF NOT EXISTS 'reporting'")
+
+    # Add client_id column to users table (column and index share the
+    # regular migration transaction)
     op.add_column('users', sa.Column('client_id', UUID(as_uuid=True), sa.ForeignKey('clients.id'), nullable=True))
     op.create_index('ix_users_client_id', 'users', ['client_id'])
 
@@ -0,0 +1,38 @@
+"""Make idx_sales_loc_status_date a covering index
+
+Revision ID: a63f6c76456e
+Revises: 72810584c52a
+Create Date: 2026-10-16
+
+The daily summary rebuild and the location-mode sales aggregations filter
+on (location_id, payment_status, transaction_date) and only read the money
+columns, so carrying those as INCLUDE columns lets them run as index-only
+scans. Index-only scans depend on the visibility map, so run
+VACUUM ANALYZE sales_transactions after a large import.
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = 'a63f6c76456e'
+down_revision = '72810584c52a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_sales_loc_status_date")
+    op.execute(
+        "CREATE INDEX idx_sales_loc_status_date "
+        "ON sales_transactions (location_id, payment_status, transaction_date) "
+        "INCLUDE (id, amount_money_amount, amount_money_currency, total_money_amount, "
+        "total_discount_amount, total_tax_amount, total_tip_amount)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_sales_loc_status_date")
+    op.execute(
+        "CREATE INDEX idx_sales_loc_status_date "
+        "ON sales_transactions (location_id, payment_status, transaction_date)"
+    )
@@ -0,0 +1,43 @@
+"""Add client listing indexes on clients, client_groups and client_locations
+
+Revision ID: a87b2ab39627
+Revises: 711cc24ab906
+Create Date: 2026-10-16
+
+Client and client group listings filter on organization_id and is_active
+and sort by name, so (organization_id, is_active, name) serves the filter
+and the ORDER BY from one index. On client_groups it supersedes
+ix_client_groups_organization_id, which is dropped.
+
+client_locations had no index beyond its primary key, so the per-client
+location lookups and counts scanned the table; (client_id, location_id)
+lets them run index-only.
+
+user_clients (user_id) and client_group_members (client_group_id) are
+already indexed by ix_user_clients_user_id and
+ix_client_group_members_client_group_id.
+"""
+from app.utils.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers
+revision = 'a87b2ab39627'
+down_revision = '711cc24ab906'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently('ix_clients_org_active_name', 'clients', ['organization_id', 'is_active', 'name'])
+    create_index_concurrently(
+        'ix_client_groups_org_active_name', 'client_groups', ['organization_id', 'is_active', 'name']
+    )
+    drop_index_concurrently('ix_client_groups_organization_id')
+    create_index_concurrently('ix_client_locations_client_id', 'client_locations', ['client_id', 'location_id'])
+
+
+def downgrade() -> None:
+    drop_index_concurrently('ix_client_locations_client_id')
+    create_index_concurrently('ix_client_groups_organization_id', 'client_groups', ['organization_id'])
+    drop_index_concurrently('ix_client_groups_org_active_name')
+    drop_index_concurrently('ix_clients_org_active_name')
@@ -0,0 +1,29 @@
+"""Add idx_footfall_org_date_loc on footfall_entries (organization_id, date, location_id)
+
+Revision ID: ac655be01bda
+Revises: a87b2ab39627
+Create Date: 2026-10-16
+
+The footfall listing filters by organization and pages in
+(date DESC, location_id DESC) order across many locations. The existing
+location-leading indexes (uq_org_location_date, idx_footfall_location_date)
+can't return that order without a sort; this index can, scanned backwards.
+"""
+from app.utils.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers
+revision = 'ac655be01bda'
+down_revision = 'a87b2ab39627'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        'idx_footfall_org_date_loc', 'footfall_entries', ['organization_id', 'date', 'location_id']
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently('idx_footfall_org_date_loc')
@@ -0,0 +1,27 @@
+"""Drop ix_role_permissions_org_role
+
+Revision ID: ee0cd31a6bb3
+Revises: 03d0d1650e94
+Create Date: 2026-10-16
+
+The uq_org_role_permission unique index on (organization_id, role,
+permission_key) serves both the per-key permission check (one probe) and
+(organization_id, role) lookups via its leading columns, so the two-column
+index is a duplicate.
+"""
+from app.utils.migration_helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers
+revision = 'ee0cd31a6bb3'
+down_revision = '03d0d1650e94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    drop_index_concurrently('ix_role_permissions_org_role')
+
+
+def downgrade() -> None:
+    create_index_concurrently('ix_role_permissions_org_role', 'role_permissions', ['organization_id', 'role'])
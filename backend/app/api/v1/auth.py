@@ -18,15 +18,17 @@ from app.schemas.auth import (
 from app.services import auth_service
 from app.models.organization import Organization
 from app.models.user import User, UserRole
-from app.models.client import user_clients
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
+MULTI_CLIENT_ROLES = frozenset({"reporting", "manager"})
+LOCATION_BASED_ROLES = frozenset({"store_manager"})
+
 
 @router.post("/login", response_model=LoginResponse)
 @limiter.limit("5/minute")
-async def login(
+def login(
     request: Request,
     credentials: LoginRequest,
     db: Session = Depends(get_db)
@@ -47,30 +49,25 @@ async def login(
 
     access_token, refresh_token = auth_service.create_user_tokens(user)
 
-    # Load assigned client IDs for multi-client roles
-    MULTI_CLIENT_ROLES = {"reporting", "manager"}
-    LOCATION_BASED_ROLES = {"store_manager"}
+    # Assigned client / location IDs were preloaded by authenticate_user
     assigned_client_ids = None
     assigned_location_ids = None
-    role_val = user.role.value if isinstance(user.role, UserRole) else user.role
+    role_val = user.role_value
     if role_val in MULTI_CLIENT_ROLES:
-        rows = db.query(user_clients.c.client_id).filter(user_clients.c.user_id == user.id).all()
-        assigned_client_ids = [str(r[0]) for r in rows] if rows else []
+        assigned_client_ids = user.assigned_client_ids
     elif role_val in LOCATION_BASED_ROLES:
-        from app.models.user import user_locations
-        rows = db.query(user_locations.c.location_id).filter(user_locations.c.user_id == user.id).all()
-        assigned_location_ids = [str(r[0]) for r in rows] if rows else []
+        assigned_location_ids = user.assigned_location_ids
 
     return LoginResponse(
         access_token=access_token,
         refresh_token=refresh_token,
         user=UserResponse(
-            id=str(user.id),
+            id=user.id,
             email=user.email,
             full_name=user.full_name,
             role=user.role.value,
-            organization_id=str(user.organization_id),
-            client_id=str(user.client_id) if user.client_id else None,
+            organization_id=user.organization_id,
+            client_id=user.client_id,
             client_ids=assigned_client_ids,
             location_ids=assigned_location_ids,
             is_active=user.is_active
@@ -80,7 +77,7 @@ async def login(
 
 @router.post("/register", response_model=LoginResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("5/minute")
-async def register(
+def register(
     request: Request,
     data: RegisterRequest,
     db: Session = Depends(get_db)
@@ -120,19 +117,19 @@ async def register(
         access_token=access_token,
         refresh_token=refresh_token,
         user=UserResponse(
-            id=str(user.id),
+            id=user.id,
             email=user.email,
             full_name=user.full_name,
             role=user.role.value,
-            organization_id=str(user.organization_id),
-            client_id=str(user.client_id) if user.client_id else None,
+            organization_id=user.organization_id,
+            client_id=user.client_id,
             is_active=user.is_active
         )
     )
 
 
 @router.post("/refresh", response_model=RefreshTokenResponse)
-async def refresh_token(
+def refresh_token(
     data: RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
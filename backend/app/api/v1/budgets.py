@@ -4,15 +4,20 @@ Budget API Endpoints
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc, and_, or_
-from datetime import date, datetime, timedelta
+from sqlalchemy import BigInteger, cast, func, desc, asc, and_, or_, literal_column, select, tuple_, exists, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from datetime import date, timedelta
+import base64
+import codecs
 import math
 import csv
 import io
+import os
 import uuid as uuid_lib
+from collections import defaultdict
 
 from app.database import get_db
-from app.dependencies import require_permission
+from app.dependencies import get_current_user, require_permission
 from app.models.user import User
 from app.models.budget import Budget, BudgetType
 from app.models.location import Location
@@ -20,6 +25,7 @@ from app.models.square_account import SquareAccount
 from app.models.sales_transaction import SalesTransaction
 from app.models.daily_sales_summary import DailySalesSummary
 from app.services.exchange_rate_service import exchange_rate_service
+from app.services.location_cache import get_org_locations
 from app.schemas.budget import (
     BudgetCreate,
     BudgetUpdate,
@@ -32,16 +38,19 @@ from app.schemas.budget import (
 
 router = APIRouter(tags=["budgets"])
 
+# Rows per INSERT ... ON CONFLICT statement when uploading a budget grid
+UPLOAD_BATCH_SIZE = 1000
 
-def get_accessible_locations(db: Session, user: User) -> list[str]:
-    """Get list of location IDs user has access to, scoped by role and client assignment."""
+
+def get_accessible_locations(db: Session, user: User) -> list[uuid_lib.UUID]:
+    """Get IDs of the locations user has access to, scoped by role and client assignment."""
     from app.models.client import Client, user_clients, client_locations
 
     if user.role in ("superadmin", "admin"):
         locations = db.query(Location.id).join(SquareAccount).filter(
             SquareAccount.organization_id == user.organization_id
         ).all()
-        return [str(loc.id) for loc in locations]
+        return [loc.id for loc in locations]
 
     # Location-based roles (store_manager): direct location assignment
     role_val = user.role.value if hasattr(user.role, 'value') else user.role
@@ -50,7 +59,7 @@ def get_accessible_locations(db: Session, user: User) -> list[str]:
         rows = db.query(user_locations.c.location_id).filter(
             user_locations.c.user_id == user.id
         ).all()
-        return [str(r[0]) for r in rows]
+        return [r[0] for r in rows]
 
     # Non-admin roles: scope to locations of assigned clients
     assigned_client_ids = [
@@ -65,101 +74,197 @@ def get_accessible_locations(db: Session, user: User) -> list[str]:
         return []
 
     location_ids = [
-        str(r[0]) for r in db.query(client_locations.c.location_id).filter(
+        r[0] for r in db.query(client_locations.c.location_id).filter(
             client_locations.c.client_id.in_(assigned_client_ids)
         ).all()
     ]
     return location_ids
 
 
+def accessible_locations(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> tuple[list[str], list[uuid_lib.UUID]]:
+    """
+    Dependency: the current user's accessible location IDs as strings and as
+    UUIDs. FastAPI caches it per request, so it is resolved at most once.
+    """
+    location_uuids = get_accessible_locations(db, current_user)
+    return [str(lid) for lid in location_uuids], location_uuids
+
+
+def _detect_csv_encoding(upload) -> str:
+    """UTF-8 (with optional BOM) if the whole upload decodes as such, else latin-1. Rewinds the file."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        while chunk := upload.read(65536):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "latin-1"
+    finally:
+        upload.seek(0)
+
+
+def _parse_budget_date(value: str) -> Optional[date]:
+    """Parse a CSV date cell: YYYY-MM-DD, falling back to DD/MM/YYYY."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        day, month, year = value.split("/")
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _parse_amount_pence(value: str) -> Optional[int]:
+    """Parse a CSV amount in pounds (thousands separators allowed) to pence."""
+    try:
+        return round(float(value.replace(",", "")) * 100)
+    except (ValueError, OverflowError):  # OverflowError: "inf"
+        return None
+
+
+# Columns selected for budget responses
+_BUDGET_COLUMNS = (
+    Budget.id,
+    Budget.location_id,
+    Budget.date,
+    Budget.budget_amount,
+    Budget.currency,
+    Budget.budget_type,
+    Budget.notes,
+    Budget.created_by,
+    Budget.created_at,
+    Budget.updated_at,
+)
+
+
+def _parse_location_ids(value: str) -> set[uuid_lib.UUID]:
+    """Parse a comma-separated location ID filter; IDs that aren't UUIDs can't match and are dropped."""
+    ids = set()
+    for lid in value.split(','):
+        try:
+            ids.add(uuid_lib.UUID(lid.strip()))
+        except ValueError:
+            continue
+    return ids
+
+
+def _budget_response(budget) -> BudgetResponse:
+    """Build a BudgetResponse from a Budget instance or row."""
+    return BudgetResponse.model_construct(
+        id=str(budget.id),
+        location_id=str(budget.location_id),
+        date=budget.date,
+        budget_amount=budget.budget_amount,
+        currency=budget.currency,
+        budget_type=budget.budget_type,
+        notes=budget.notes,
+        created_by=str(budget.created_by),
+        created_at=budget.created_at,
+        updated_at=budget.updated_at,
+    )
+
+
+def _currency_breakdown(totals: dict[str, list[int]], rate: dict[str, float]) -> list[dict]:
+    """Shape per-currency [amount, converted_amount] totals for the performance summary."""
+    return [
+        {"currency": currency, "amount": amount, "converted_amount": converted, "rate": round(rate[currency], 6)}
+        for currency, (amount, converted) in totals.items()
+    ]
+
+
+def _encode_cursor(budget) -> str:
+    """Opaque keyset cursor for the (date, id) position of the last budget on a page."""
+    raw = f"{budget.date.isoformat()}|{budget.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[date, uuid_lib.UUID]:
+    try:
+        date_str, id_str = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(date_str), uuid_lib.UUID(id_str)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.post("/", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
-async def create_budget(
+def create_budget(
     budget: BudgetCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("feature:manage_budgets")),
+    accessible: tuple[list[str], list[uuid_lib.UUID]] = Depends(accessible_locations),
 ):
     """
     Create a new budget
     """
     # Check user has access to this location
-    accessible_locations = get_accessible_locations(db, current_user)
-    if budget.location_id not in accessible_locations:
+    if budget.location_id not in accessible[0]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this location"
         )
 
-    # Check if budget already exists for this location, date, and type
-    existing = db.query(Budget).filter(
-        Budget.location_id == budget.location_id,
-        Budget.date == budget.date,
-        Budget.budget_type == budget.budget_type
+    # Insert unless a budget already exists for this location, date, and type
+    created = db.execute(
+        pg_insert(Budget).values(
+            id=uuid_lib.uuid4(),
+            location_id=uuid_lib.UUID(budget.location_id),
+            date=budget.date,
+            budget_amount=budget.budget_amount,
+            currency=budget.currency,
+            budget_type=budget.budget_type,
+            notes=budget.notes,
+            created_by=current_user.id,
+        ).on_conflict_do_nothing(
+            index_elements=[Budget.location_id, Budget.date, Budget.budget_type],
+        ).returning(*_BUDGET_COLUMNS)
     ).first()
 
-    if existing:
+    if created is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Budget already exists for this location, date, and type"
         )
 
-    # Create budget
-    db_budget = Budget(
-        id=uuid_lib.uuid4(),
-        location_id=uuid_lib.UUID(budget.location_id),
-        date=budget.date,
-        budget_amount=budget.budget_amount,
-        currency=budget.currency,
-        budget_type=budget.budget_type,
-        notes=budget.notes,
-        created_by=current_user.id,
-    )
-
-    db.add(db_budget)
     db.commit()
-    db.refresh(db_budget)
-
-    return BudgetResponse(
-        id=str(db_budget.id),
-        location_id=str(db_budget.location_id),
-        date=db_budget.date,
-        budget_amount=db_budget.budget_amount,
-        currency=db_budget.currency,
-        budget_type=db_budget.budget_type,
-        notes=db_budget.notes,
-        created_by=str(db_budget.created_by),
-        created_at=db_budget.created_at,
-        updated_at=db_budget.updated_at,
-    )
+
+    return _budget_response(created)
 
 
 @router.get("/", response_model=BudgetListResponse)
-async def list_budgets(
+def list_budgets(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("page:budgets")),
+    accessible: tuple[list[str], list[uuid_lib.UUID]] = Depends(accessible_locations),
     location_ids: Optional[str] = Query(None, description="Comma-separated location IDs"),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     budget_type: Optional[BudgetType] = Query(None),
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="Deprecated: use cursor"),
     page_size: int = Query(50, ge=1, le=1000),
 ):
     """
-    List budgets with filtering and pagination
+    List budgets with filtering and keyset pagination.
+    Pages are ordered by (date, id) descending; pass next_cursor back as
+    ?cursor= for the following page. ?page= still works but is deprecated.
     """
-    # Get user's accessible locations
-    accessible_location_ids = get_accessible_locations(db, current_user)
+    accessible_uuids = accessible[1]
 
     # Build query
-    query = db.query(Budget).filter(
-        Budget.location_id.in_([uuid_lib.UUID(lid) for lid in accessible_location_ids])
-    )
+    query = db.query(*_BUDGET_COLUMNS).filter(Budget.location_id.in_(accessible_uuids))
 
     # Apply filters
     if location_ids:
-        requested_ids = [lid.strip() for lid in location_ids.split(',')]
-        filtered_ids = [lid for lid in requested_ids if lid in accessible_location_ids]
+        requested_ids = _parse_location_ids(location_ids)
+        filtered_ids = [lid for lid in accessible_uuids if lid in requested_ids]
         if filtered_ids:
-            query = query.filter(Budget.location_id.in_([uuid_lib.UUID(lid) for lid in filtered_ids]))
+            query = query.filter(Budget.location_id.in_(filtered_ids))
 
     if start_date:
         query = query.filter(Budget.date >= start_date)
@@ -170,38 +275,32 @@ async def list_budgets(
     if budget_type:
         query = query.filter(Budget.budget_type == budget_type)
 
-    # Get total count
-    total = query.count()
-
-    # Apply sorting
-    query = query.order_by(desc(Budget.date))
-
-    # Apply pagination
-    offset = (page - 1) * page_size
-    budgets = query.offset(offset).limit(page_size).all()
+    total = None
+    if cursor:
+        last_date, last_id = _decode_cursor(cursor)
+        query = query.filter(tuple_(Budget.date, Budget.id) < tuple_(last_date, last_id))
+    else:
+        # Legacy page-number pagination, kept for existing clients
+        total = query.count()
+        if page > 1:
+            query = query.offset((page - 1) * page_size)
+
+    # Fetch one extra row to learn whether another page exists
+    budgets = query.order_by(desc(Budget.date), desc(Budget.id)).limit(page_size + 1).all()
+    next_cursor = None
+    if len(budgets) > page_size:
+        budgets = budgets[:page_size]
+        next_cursor = _encode_cursor(budgets[-1])
 
     return BudgetListResponse(
-        budgets=[
-            BudgetResponse(
-                id=str(b.id),
-                location_id=str(b.location_id),
-                date=b.date,
-                budget_amount=b.budget_amount,
-                currency=b.currency,
-                budget_type=b.budget_type,
-                notes=b.notes,
-                created_by=str(b.created_by),
-                created_at=b.created_at,
-                updated_at=b.updated_at,
-            )
-            for b in budgets
-        ],
-        total=total
+        budgets=[_budget_response(b) for b in budgets],
+        total=total,
+        next_cursor=next_cursor,
     )
 
 
 @router.post("/upload-csv", response_model=BudgetUploadResponse)
-async def upload_budget_csv(
+def upload_budget_csv(
     file: UploadFile = File(...),
     currency: str = Query("GBP", description="Currency code"),
     db: Session = Depends(get_db),
@@ -217,20 +316,22 @@ async def upload_budget_csv(
         raise HTTPException(status_code=400, detail="File must be a .csv")
 
     MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
+    # Parse straight from the spooled upload rather than holding the raw
+    # bytes, the decoded text and a StringIO copy in memory at once
+    upload = file.file
+    upload.seek(0, os.SEEK_END)
+    if upload.tell() > MAX_FILE_SIZE:
         raise HTTPException(status_code=413, detail="File too large. Maximum size is 5 MB.")
-    try:
-        text = content.decode("utf-8-sig")  # handles BOM from Excel
-    except UnicodeDecodeError:
-        text = content.decode("latin-1")
+    upload.seek(0)
 
-    reader = csv.DictReader(io.StringIO(text))
-    if not reader.fieldnames:
+    encoding = _detect_csv_encoding(upload)  # utf-8-sig handles BOM from Excel
+    reader = csv.reader(io.TextIOWrapper(upload, encoding=encoding, newline=""))
+    header_row = next(reader, None)
+    if not header_row:
         raise HTTPException(status_code=400, detail="CSV has no headers")
 
     # Normalise headers
-    headers = [h.strip() for h in reader.fieldnames]
+    headers = [h.strip() for h in header_row]
     if headers[0].lower() != "date":
         raise HTTPException(status_code=400, detail="First column must be 'date'")
 
@@ -238,86 +339,85 @@ async def upload_budget_csv(
     if not location_columns:
         raise HTTPException(status_code=400, detail="CSV must have at least one location column")
 
-    # Build location name → id lookup (org-scoped, case-insensitive)
-    org_account_ids = [
-        r[0] for r in db.query(SquareAccount.id).filter(
-            SquareAccount.organization_id == current_user.organization_id
-        ).all()
-    ]
-    org_locations = db.query(Location).filter(
-        Location.square_account_id.in_(org_account_ids)
-    ).all()
-
-    loc_lookup: dict[str, Location] = {}
-    for loc in org_locations:
-        loc_lookup[loc.name.strip().lower()] = loc
+    # Location name → id lookup (org-scoped, case-insensitive)
+    _, loc_lookup = get_org_locations(db, current_user.organization_id)
 
-    # Match CSV columns to locations
-    matched: dict[str, Location] = {}
+    # Match CSV columns (by position) to locations
+    matched: list[tuple[int, uuid_lib.UUID]] = []
     unmatched: list[str] = []
-    for col in location_columns:
-        loc = loc_lookup.get(col.strip().lower())
+    for idx, col in enumerate(location_columns, start=1):
+        loc = loc_lookup.get(col.lower())
         if loc:
-            matched[col] = loc
+            matched.append((idx, loc.id))
         else:
             unmatched.append(col)
 
+    width = len(headers)
     rows_processed = 0
-    created = 0
-    updated = 0
+    # (location_id, date) -> pence; a later CSV row for the same cell wins
+    cells: dict[tuple, int] = {}
 
     for row in reader:
-        date_str = row.get(headers[0], "").strip()
+        date_str = row[0].strip() if row else ""
         if not date_str:
             continue
 
-        try:
-            budget_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        except ValueError:
-            # Try alternative formats
-            try:
-                budget_date = datetime.strptime(date_str, "%d/%m/%Y").date()
-            except ValueError:
-                continue  # skip unparseable rows
+        budget_date = _parse_budget_date(date_str)
+        if budget_date is None:
+            continue  # skip unparseable rows
 
         rows_processed += 1
+        if len(row) < width:
+            # Pad short rows once so the cell loop can index unconditionally
+            row.extend([""] * (width - len(row)))
 
-        for col, loc in matched.items():
-            raw_val = row.get(col, "").strip()
+        for idx, location_id in matched:
+            raw_val = row[idx].strip()
             if not raw_val:
                 continue
 
-            try:
-                amount_pounds = float(raw_val.replace(",", ""))
-                amount_pence = round(amount_pounds * 100)
-            except ValueError:
+            amount_pence = _parse_amount_pence(raw_val)
+            if amount_pence is None or amount_pence <= 0:
                 continue
 
-            if amount_pence <= 0:
-                continue
+            cells[(location_id, budget_date)] = amount_pence
+
+    # Upsert every cell against uq_location_date_type. Cells whose amount and
+    # currency are unchanged are skipped by the conflict WHERE and return no
+    # row; xmax = 0 marks the rows that were inserted rather than updated.
+    rows = [
+        {
+            "id": uuid_lib.uuid4(),
+            "location_id": location_id,
+            "date": budget_date,
+            "budget_amount": amount_pence,
+            "currency": currency,
+            "budget_type": BudgetType.DAILY,
+            "created_by": current_user.id,
+        }
+        for (location_id, budget_date), amount_pence in cells.items()
+    ]
 
-            # Upsert
-            existing = db.query(Budget).filter(
-                Budget.location_id == loc.id,
-                Budget.date == budget_date,
-                Budget.budget_type == BudgetType.DAILY,
-            ).first()
-
-            if existing:
-                existing.budget_amount = amount_pence
-                existing.currency = currency
-                updated += 1
-            else:
-                db.add(Budget(
-                    id=uuid_lib.uuid4(),
-                    location_id=loc.id,
-                    date=budget_date,
-                    budget_amount=amount_pence,
-                    currency=currency,
-                    budget_type=BudgetType.DAILY,
-                    created_by=current_user.id,
-                ))
-                created += 1
+    created = 0
+    updated = 0
+    for i in range(0, len(rows), UPLOAD_BATCH_SIZE):
+        batch = rows[i:i + UPLOAD_BATCH_SIZE]
+        stmt = pg_insert(Budget).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Budget.location_id, Budget.date, Budget.budget_type],
+            set_={
+                "budget_amount": stmt.excluded.budget_amount,
+                "currency": stmt.excluded.currency,
+                "updated_at": func.now(),
+            },
+            where=or_(
+                Budget.budget_amount != stmt.excluded.budget_amount,
+                Budget.currency != stmt.excluded.currency,
+            ),
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        batch_created = sum(1 for inserted, in db.execute(stmt) if inserted)
+        created += batch_created
+        updated += len(batch) - batch_created
 
     db.commit()
 
@@ -331,9 +431,10 @@ async def upload_budget_csv(
 
 
 @router.get("/coverage")
-async def get_budget_coverage(
+def get_budget_coverage(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("page:budgets")),
+    accessible: tuple[list[str], list[uuid_lib.UUID]] = Depends(accessible_locations),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
 ):
@@ -348,59 +449,41 @@ async def get_budget_coverage(
     if not start_date:
         start_date = end_date - timedelta(days=29)
 
-    accessible_location_ids = get_accessible_locations(db, current_user)
-    if not accessible_location_ids:
+    loc_uuids = accessible[1]
+    if not loc_uuids:
         return {"locations": [], "start_date": str(start_date), "end_date": str(end_date)}
 
-    loc_uuids = [uuid_lib.UUID(lid) for lid in accessible_location_ids]
-
-    # Days with sales per location (transaction_count > 0)
-    sales_days = db.query(
+    # Per location: days with sales (transaction_count > 0), and the subset of
+    # those with no budget entry, found by an anti-join in the same statement
+    has_budget = exists().where(
+        Budget.location_id == DailySalesSummary.location_id,
+        Budget.date == DailySalesSummary.date,
+    )
+    coverage_rows = db.query(
         DailySalesSummary.location_id,
-        DailySalesSummary.date,
+        Location.name,
+        func.count().label("sales_days"),
+        func.array_agg(aggregate_order_by(DailySalesSummary.date, DailySalesSummary.date))
+            .filter(~has_budget).label("missing_days"),
+    ).join(
+        Location, Location.id == DailySalesSummary.location_id
     ).filter(
         DailySalesSummary.location_id.in_(loc_uuids),
         DailySalesSummary.date >= start_date,
         DailySalesSummary.date <= end_date,
         DailySalesSummary.transaction_count > 0,
-    ).all()
-
-    # Days with budget entries per location
-    budget_days = db.query(
-        Budget.location_id,
-        Budget.date,
-    ).filter(
-        Budget.location_id.in_(loc_uuids),
-        Budget.date >= start_date,
-        Budget.date <= end_date,
-    ).all()
-
-    budget_set = {(str(r.location_id), r.date) for r in budget_days}
-
-    # Group missing days by location
-    missing_by_loc: dict[str, list] = {}
-    sales_by_loc: dict[str, int] = {}
-    for row in sales_days:
-        loc_id = str(row.location_id)
-        sales_by_loc[loc_id] = sales_by_loc.get(loc_id, 0) + 1
-        if (loc_id, row.date) not in budget_set:
-            missing_by_loc.setdefault(loc_id, []).append(str(row.date))
-
-    # Get location names
-    loc_ids_needed = set(sales_by_loc.keys())
-    loc_names = {}
-    if loc_ids_needed:
-        locs = db.query(Location).filter(Location.id.in_([uuid_lib.UUID(lid) for lid in loc_ids_needed])).all()
-        loc_names = {str(loc.id): loc.name for loc in locs}
+    ).group_by(
+        DailySalesSummary.location_id, Location.name
+    ).order_by(Location.name).all()
 
     results = []
-    for loc_id in sorted(loc_ids_needed, key=lambda x: loc_names.get(x, "")):
-        missing = sorted(missing_by_loc.get(loc_id, []))
+    for row in coverage_rows:
+        missing = [str(d) for d in row.missing_days or []]
         results.append({
-            "location_id": loc_id,
-            "location_name": loc_names.get(loc_id, "Unknown"),
-            "sales_days": sales_by_loc.get(loc_id, 0),
-            "budget_days": sales_by_loc.get(loc_id, 0) - len(missing),
+            "location_id": str(row.location_id),
+            "location_name": row.name,
+            "sales_days": row.sales_days,
+            "budget_days": row.sales_days - len(missing),
             "missing_days": missing,
         })
 
@@ -412,28 +495,22 @@ async def get_budget_coverage(
 
 
 @router.get("/locations", response_model=list[dict])
-async def get_budget_locations(
+def get_budget_locations(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("page:budgets")),
 ):
     """Get location names for the current user's org (for CSV template generation)."""
-    org_account_ids = [
-        r[0] for r in db.query(SquareAccount.id).filter(
-            SquareAccount.organization_id == current_user.organization_id
-        ).all()
-    ]
-    locations = db.query(Location).filter(
-        Location.square_account_id.in_(org_account_ids),
-        Location.is_active == True,
-    ).order_by(Location.name).all()
+    locations_by_id, _ = get_org_locations(db, current_user.organization_id)
+    locations = sorted((loc for loc in locations_by_id.values() if loc.is_active), key=lambda loc: loc.name)
 
     return [{"id": str(loc.id), "name": loc.name, "currency": loc.currency} for loc in locations]
 
 
 @router.get("/performance/report", response_model=BudgetPerformanceReport)
-async def get_budget_performance(
+def get_budget_performance(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("report:budget_vs_actual")),
+    accessible: tuple[list[str], list[uuid_lib.UUID]] = Depends(accessible_locations),
     location_ids: Optional[str] = Query(None, description="Comma-separated location IDs"),
     client_id: Optional[str] = Query(None, description="Filter by client ID"),
     client_group_id: Optional[str] = Query(None, description="Filter by client group"),
@@ -455,8 +532,7 @@ async def get_budget_performance(
         start_date_d: Optional[date] = date.fromisoformat(start_date) if start_date else None
         end_date_d: Optional[date] = date.fromisoformat(end_date) if end_date else None
 
-    # Get accessible locations
-    accessible_location_ids = get_accessible_locations(db, current_user)
+    loc_uuids = accessible[1]
 
     # Resolve client group to client IDs
     if client_group_id:
@@ -467,112 +543,115 @@ async def get_budget_performance(
             multi_loc_rows = db.query(cl.c.location_id).filter(
                 cl.c.client_id.in_(group_client_ids)
             ).all()
-            group_loc_ids = {str(r[0]) for r in multi_loc_rows}
-            accessible_location_ids = [lid for lid in accessible_location_ids if lid in group_loc_ids]
+            group_loc_ids = {r[0] for r in multi_loc_rows}
+            loc_uuids = [lid for lid in loc_uuids if lid in group_loc_ids]
             client_id = None  # group overrides individual client
 
     # Filter by client if specified
     if client_id:
-        from app.models.client import Client
-        client = db.query(Client).filter(Client.id == uuid_lib.UUID(client_id)).first()
-        if client:
-            client_location_ids = [str(loc.id) for loc in client.locations]
-            accessible_location_ids = [lid for lid in accessible_location_ids if lid in client_location_ids]
+        from app.models.client import client_locations as cl
+        client_location_ids = {
+            r[0] for r in db.query(cl.c.location_id).filter(
+                cl.c.client_id == uuid_lib.UUID(client_id)
+            ).all()
+        }
+        loc_uuids = [lid for lid in loc_uuids if lid in client_location_ids]
 
     # Further filter by requested locations
     if location_ids:
-        requested_ids = [lid.strip() for lid in location_ids.split(',')]
-        accessible_location_ids = [lid for lid in accessible_location_ids if lid in requested_ids]
+        requested_ids = _parse_location_ids(location_ids)
+        loc_uuids = [lid for lid in loc_uuids if lid in requested_ids]
 
-    if not accessible_location_ids:
+    if not loc_uuids:
         return BudgetPerformanceReport(performances=[], summary={})
 
-    # Query budgets and sales for the date range
-    budget_query = db.query(
-        Budget.location_id,
-        Budget.date,
-        func.sum(Budget.budget_amount).label("total_budget"),
-        Budget.currency
-    ).filter(
-        Budget.location_id.in_([uuid_lib.UUID(lid) for lid in accessible_location_ids])
-    )
-
+    # Budget totals joined to actual net sales (gross - tax - refunds) from the
+    # pre-aggregated daily summary, in one round-trip
+    budget_filters = [Budget.location_id.in_(loc_uuids)]
+    sales_filters = [DailySalesSummary.location_id.in_(loc_uuids)]
     if start_date_d:
-        budget_query = budget_query.filter(Budget.date >= start_date_d)
+        budget_filters.append(Budget.date >= start_date_d)
+        sales_filters.append(DailySalesSummary.date >= start_date_d)
     if end_date_d:
-        budget_query = budget_query.filter(Budget.date <= end_date_d)
-
-    budget_query = budget_query.group_by(Budget.location_id, Budget.date, Budget.currency)
-    budgets_data = budget_query.all()
+        budget_filters.append(Budget.date <= end_date_d)
+        sales_filters.append(DailySalesSummary.date <= end_date_d)
 
-    # Query actual sales from pre-aggregated daily summary (net = gross - tax - refunds)
-    sales_query = db.query(
+    budget_q = select(
+        Budget.location_id,
+        Budget.date,
+        Budget.currency,
+        cast(func.sum(Budget.budget_amount), BigInteger).label("total_budget"),
+    ).where(*budget_filters).group_by(Budget.location_id, Budget.date, Budget.currency).subquery()
+
+    net_sales = (
+        func.coalesce(DailySalesSummary.total_sales, 0)
+        - func.coalesce(DailySalesSummary.total_tax, 0)
+        - func.coalesce(DailySalesSummary.total_refund_amount, 0)
+    )
+    sales_q = select(
         DailySalesSummary.location_id,
         DailySalesSummary.date,
-        DailySalesSummary.total_sales,
-        DailySalesSummary.total_tax,
-        DailySalesSummary.total_refund_amount,
-        DailySalesSummary.currency,
-    ).filter(
-        DailySalesSummary.location_id.in_([uuid_lib.UUID(lid) for lid in accessible_location_ids])
-    )
-
-    if start_date_d:
-        sales_query = sales_query.filter(DailySalesSummary.date >= start_date_d)
-    if end_date_d:
-        sales_query = sales_query.filter(DailySalesSummary.date <= end_date_d)
-
-    sales_data = sales_query.all()
-
-    # Create lookup for sales by location and date (net sales = gross - tax - refunds)
-    sales_lookup = {}
-    for sale in sales_data:
-        key = (str(sale.location_id), sale.date)
-        net_sales = (sale.total_sales or 0) - (sale.total_tax or 0) - (sale.total_refund_amount or 0)
-        prev = sales_lookup.get(key)
-        if prev:
-            sales_lookup[key] = (prev[0] + net_sales, prev[1])
-        else:
-            sales_lookup[key] = (net_sales, sale.currency)
-
-    # Get location names
-    locations = db.query(Location).filter(
-        Location.id.in_([uuid_lib.UUID(lid) for lid in accessible_location_ids])
+        cast(func.sum(net_sales), BigInteger).label("net_sales"),
+        func.min(DailySalesSummary.currency).label("currency"),
+    ).where(*sales_filters).group_by(DailySalesSummary.location_id, DailySalesSummary.date).subquery()
+
+    budgets_data = db.execute(
+        select(
+            budget_q.c.location_id,
+            budget_q.c.date,
+            budget_q.c.currency,
+            budget_q.c.total_budget,
+            func.coalesce(sales_q.c.net_sales, 0).label("actual_sales"),
+            func.coalesce(sales_q.c.currency, budget_q.c.currency).label("sales_currency"),
+        ).select_from(
+            budget_q.outerjoin(sales_q, and_(
+                sales_q.c.location_id == budget_q.c.location_id,
+                sales_q.c.date == budget_q.c.date,
+            ))
+        )
     ).all()
-    location_names = {str(loc.id): loc.name for loc in locations}
+
+    locations_by_id, _ = get_org_locations(db, current_user.organization_id)
 
     # --- Exchange rates: convert all amounts to GBP ---
     all_currencies = set()
     for b in budgets_data:
         all_currencies.add(b.currency)
-    for s in sales_data:
-        if hasattr(s, 'currency') and s.currency:
-            all_currencies.add(s.currency)
+        all_currencies.add(b.sales_currency)
     rates_to_gbp, rates_live = exchange_rate_service.get_rates_to_gbp(db, current_user.organization_id, all_currencies)
+    rate = {c: rates_to_gbp.get(c, 1.0) for c in all_currencies}
 
     # Calculate performance metrics
     performances = []
+    locations_on_target = 0
+    performance_location_ids = set()
     total_budget = 0
     total_sales = 0
-    budget_by_currency = {}
-    sales_by_currency = {}
+    # currency -> [amount, converted_amount]
+    budget_by_currency = defaultdict(lambda: [0, 0])
+    sales_by_currency = defaultdict(lambda: [0, 0])
 
     for budget_data in budgets_data:
         location_id = str(budget_data.location_id)
-        sales_entry = sales_lookup.get((location_id, budget_data.date))
-        actual_sales = sales_entry[0] if sales_entry else 0
-        sales_currency = sales_entry[1] if sales_entry else budget_data.currency
+        location = locations_by_id.get(budget_data.location_id)
+        budget_amount = budget_data.total_budget
+        actual_sales = budget_data.actual_sales
+        budget_currency = budget_data.currency
+        sales_currency = budget_data.sales_currency
 
         # Convert both to GBP — budget and sales may be in different currencies
-        budget_rate = rates_to_gbp.get(budget_data.currency, 1.0)
-        sales_rate = rates_to_gbp.get(sales_currency, 1.0)
-        converted_budget = round(int(budget_data.total_budget) * budget_rate)
-        converted_sales = round(int(actual_sales) * sales_rate)
+        converted_budget = round(budget_amount * rate[budget_currency])
+        converted_sales = round(actual_sales * rate[sales_currency])
 
         variance = converted_sales - converted_budget
         variance_percentage = (variance / converted_budget * 100) if converted_budget > 0 else 0.0
         attainment_percentage = (converted_sales / converted_budget * 100) if converted_budget > 0 else 0.0
 
+        attainment_rounded = round(attainment_percentage, 2)
+        if attainment_rounded >= 90:
+            locations_on_target += 1
+        performance_location_ids.add(location_id)
+
         # Determine status
         if attainment_percentage >= 100:
             status_val = "exceeded"
@@ -581,15 +660,15 @@ async def get_budget_performance(
         else:
             status_val = "below_target"
 
-        performances.append(BudgetPerformance(
+        performances.append(BudgetPerformance.model_construct(
             location_id=location_id,
-            location_name=location_names.get(location_id, "Unknown"),
+            location_name=location.name if location else "Unknown",
             date=budget_data.date,
             budget_amount=converted_budget,
             actual_sales=converted_sales,
             variance=variance,
             variance_percentage=round(variance_percentage, 2),
-            attainment_percentage=round(attainment_percentage, 2),
+            attainment_percentage=attainment_rounded,
             currency="GBP",
             status=status_val
         ))
@@ -598,22 +677,17 @@ async def get_budget_performance(
         total_sales += converted_sales
 
         # Track per-currency breakdown
-        bcurr = budget_data.currency
-        if bcurr not in budget_by_currency:
-            budget_by_currency[bcurr] = {"currency": bcurr, "amount": 0, "converted_amount": 0, "rate": round(budget_rate, 6)}
-        budget_by_currency[bcurr]["amount"] += int(budget_data.total_budget)
-        budget_by_currency[bcurr]["converted_amount"] += converted_budget
-
-        scurr = sales_currency
-        if scurr not in sales_by_currency:
-            sales_by_currency[scurr] = {"currency": scurr, "amount": 0, "converted_amount": 0, "rate": round(sales_rate, 6)}
-        sales_by_currency[scurr]["amount"] += int(actual_sales)
-        sales_by_currency[scurr]["converted_amount"] += converted_sales
+        entry = budget_by_currency[budget_currency]
+        entry[0] += budget_amount
+        entry[1] += converted_budget
+
+        entry = sales_by_currency[sales_currency]
+        entry[0] += actual_sales
+        entry[1] += converted_sales
 
     # Calculate summary (all in GBP)
     overall_variance = total_sales - total_budget
     overall_attainment = (total_sales / total_budget * 100) if total_budget > 0 else 0
-    locations_on_target = sum(1 for p in performances if p.attainment_percentage >= 90)
 
     exchange_rates_resp = {k: round(v, 6) for k, v in rates_to_gbp.items() if k != "GBP"}
 
@@ -623,9 +697,9 @@ async def get_budget_performance(
         "overall_variance": int(overall_variance),
         "overall_attainment_percentage": float(round(overall_attainment, 2)),
         "locations_on_target": locations_on_target,
-        "total_locations": len(set(p.location_id for p in performances)),
-        "budget_by_currency": list(budget_by_currency.values()),
-        "sales_by_currency": list(sales_by_currency.values()),
+        "total_locations": len(performance_location_ids),
+        "budget_by_currency": _currency_breakdown(budget_by_currency, rate),
+        "sales_by_currency": _currency_breakdown(sales_by_currency, rate),
         "exchange_rates": exchange_rates_resp,
     }
     if not rates_live:
@@ -640,15 +714,16 @@ async def get_budget_performance(
 # ── Catch-all routes with path parameters MUST come after specific routes ──
 
 @router.get("/{budget_id}", response_model=BudgetResponse)
-async def get_budget(
+def get_budget(
     budget_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("page:budgets")),
+    accessible: tuple[list[str], list[uuid_lib.UUID]] = Depends(accessible_locations),
 ):
     """
     Get a specific budget by ID
     """
-    budget = db.query(Budget).filter(Budget.id == uuid_lib.UUID(budget_id)).first()
+    budget = db.query(*_BUDGET_COLUMNS).filter(Budget.id == uuid_lib.UUID(budget_id)).first()
 
     if not budget:
         raise HTTPException(
@@ -657,38 +732,27 @@ async def get_budget(
         )
 
     # Check user has access
-    accessible_locations = get_accessible_locations(db, current_user)
-    if str(budget.location_id) not in accessible_locations:
+    if budget.location_id not in accessible[1]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this budget"
         )
 
-    return BudgetResponse(
-        id=str(budget.id),
-        location_id=str(budget.location_id),
-        date=budget.date,
-        budget_amount=budget.budget_amount,
-        currency=budget.currency,
-        budget_type=budget.budget_type,
-        notes=budget.notes,
-        created_by=str(budget.created_by),
-        created_at=budget.created_at,
-        updated_at=budget.updated_at,
-    )
+    return _budget_response(budget)
 
 
 @router.patch("/{budget_id}", response_model=BudgetResponse)
-async def update_budget(
+def update_budget(
     budget_id: str,
     budget_update: BudgetUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("feature:manage_budgets")),
+    accessible: tuple[list[str], list[uuid_lib.UUID]] = Depends(accessible_locations),
 ):
     """
     Update a budget
     """
-    budget = db.query(Budget).filter(Budget.id == uuid_lib.UUID(budget_id)).first()
+    budget = db.query(*_BUDGET_COLUMNS).filter(Budget.id == uuid_lib.UUID(budget_id)).first()
 
     if not budget:
         raise HTTPException(
@@ -697,43 +761,36 @@ async def update_budget(
         )
 
     # Check user has access
-    accessible_locations = get_accessible_locations(db, current_user)
-    if str(budget.location_id) not in accessible_locations:
+    if budget.location_id not in accessible[1]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this budget"
         )
 
     # Update fields
+    values = {}
     if budget_update.budget_amount is not None:
-        budget.budget_amount = budget_update.budget_amount
+        values["budget_amount"] = budget_update.budget_amount
     if budget_update.budget_type is not None:
-        budget.budget_type = budget_update.budget_type
+        values["budget_type"] = budget_update.budget_type
     if budget_update.notes is not None:
-        budget.notes = budget_update.notes
+        values["notes"] = budget_update.notes
 
-    db.commit()
-    db.refresh(budget)
+    if values:
+        budget = db.execute(
+            update(Budget).where(Budget.id == budget.id).values(**values).returning(*_BUDGET_COLUMNS)
+        ).one()
+        db.commit()
 
-    return BudgetResponse(
-        id=str(budget.id),
-        location_id=str(budget.location_id),
-        date=budget.date,
-        budget_amount=budget.budget_amount,
-        currency=budget.currency,
-        budget_type=budget.budget_type,
-        notes=budget.notes,
-        created_by=str(budget.created_by),
-        created_at=budget.created_at,
-        updated_at=budget.updated_at,
-    )
+    return _budget_response(budget)
 
 
 @router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_budget(
+def delete_budget(
     budget_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("feature:manage_budgets")),
+    accessible: tuple[list[str], list[uuid_lib.UUID]] = Depends(accessible_locations),
 ):
     """
     Delete a budget
@@ -747,8 +804,7 @@ async def delete_budget(
         )
 
     # Check user has access
-    accessible_locations = get_accessible_locations(db, current_user)
-    if str(budget.location_id) not in accessible_locations:
+    if budget.location_id not in accessible[1]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have access to this budget"
@@ -2,14 +2,24 @@
 Client Groups API — CRUD for grouping clients for aggregated analytics.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, insert, or_, select
 from sqlalchemy.orm import Session
 import uuid as uuid_lib
+from collections import defaultdict
 
 from app.database import get_db
 from app.dependencies import get_current_user, require_role
 from app.models.user import User
 from app.models.client import Client, user_clients
 from app.models.client_group import ClientGroup, client_group_members
+from app.utils.cache import (
+    bump_org_cache_version,
+    cache_delete,
+    cache_get,
+    cache_set,
+    cached_response,
+    org_response_key,
+)
 from app.schemas.client_group import (
     ClientGroupCreate,
     ClientGroupUpdate,
@@ -20,124 +30,172 @@ from app.schemas.client_group import (
 router = APIRouter(prefix="/client-groups", tags=["client-groups"])
 
 
-def _get_user_accessible_client_ids(db: Session, user) -> set:
-    """Get client IDs accessible to this user based on role/client assignment."""
-    from app.models.user import UserRole
+# Columns selected for group responses
+_GROUP_COLUMNS = (
+    ClientGroup.id,
+    ClientGroup.name,
+    ClientGroup.is_active,
+    ClientGroup.created_at,
+    ClientGroup.updated_at,
+)
 
-    role_val = user.role.value if isinstance(user.role, UserRole) else user.role
+# Seconds a user's accessible client IDs are served from Redis
+ACCESSIBLE_CLIENTS_TTL = 60
 
-    # Admin/superadmin: all org clients
+
+def _accessible_clients_key(user) -> str:
+    role_val = user.role_value
+    # Admins see every org client, so they share one org-wide entry
     if role_val in ("admin", "superadmin"):
-        rows = db.query(Client.id).filter(
-            Client.organization_id == user.organization_id
-        ).all()
-        return {str(r[0]) for r in rows}
+        return f"org_client_ids:{user.organization_id}"
+    return f"user_accessible_clients:{user.id}"
+
+
+def invalidate_accessible_client_ids(user_id=None, organization_id=None) -> None:
+    """Drop cached client scopes after a user's assignments or an org's clients change."""
+    keys = []
+    if user_id is not None:
+        keys.append(f"user_accessible_clients:{user_id}")
+    if organization_id is not None:
+        keys.append(f"org_client_ids:{organization_id}")
+    cache_delete(*keys)
+
+
+def _get_user_accessible_client_ids(db: Session, user) -> set:
+    """Get client IDs (UUIDs) accessible to this user, cached in Redis for ACCESSIBLE_CLIENTS_TTL."""
+    key = _accessible_clients_key(user)
+    cached = cache_get(key)
+    if cached is not None:
+        return {uuid_lib.UUID(cid) for cid in cached}
+
+    client_ids = _load_user_accessible_client_ids(db, user)
+    cache_set(key, sorted(str(cid) for cid in client_ids), ACCESSIBLE_CLIENTS_TTL)
+    return client_ids
 
-    # Client role: just their client
-    if role_val == "client" and user.client_id:
-        return {str(user.client_id)}
 
-    # Multi-client roles: assigned clients
-    multi_rows = db.query(user_clients.c.client_id).filter(
-        user_clients.c.user_id == user.id
-    ).all()
-    client_ids = [r[0] for r in multi_rows]
-    if client_ids:
-        return {str(cid) for cid in client_ids}
+def _load_user_accessible_client_ids(db: Session, user) -> set:
+    """Get client IDs (UUIDs) accessible to this user based on role/client assignment."""
+    role_val = user.role_value
 
-    # Fallback: legacy client_id
-    if user.client_id:
-        return {str(user.client_id)}
+    # Client role: just their client, no query needed
+    if role_val == "client" and user.client_id:
+        return {user.client_id}
+
+    query = db.query(Client.id).filter(Client.organization_id == user.organization_id)
+
+    # Admin/superadmin: all org clients. Other roles: their assigned clients,
+    # falling back to the legacy client_id only when nothing is assigned,
+    # resolved in the same query.
+    if role_val not in ("admin", "superadmin"):
+        assigned = select(user_clients.c.client_id).where(user_clients.c.user_id == user.id)
+        query = query.filter(or_(
+            Client.id.in_(assigned),
+            and_(Client.id == user.client_id, ~assigned.exists()),
+        ))
 
-    return set()
+    return {r[0] for r in query.all()}
+
+
+def _build_group_responses(db: Session, groups: list, accessible_ids: set = None) -> list:
+    """
+    Build ClientGroupResponses for several groups with a single member query,
+    optionally filtering members to accessible clients (a set of UUIDs).
+    """
+    members = defaultdict(list)
+    if groups:
+        member_rows = db.query(
+            client_group_members.c.client_group_id,
+            Client.id,
+            Client.name,
+        ).join(
+            Client, Client.id == client_group_members.c.client_id
+        ).filter(
+            client_group_members.c.client_group_id.in_([g.id for g in groups])
+        ).all()
+        for group_id, client_id, client_name in member_rows:
+            # Filter to accessible clients if provided; stringify only what is kept
+            if accessible_ids is None or client_id in accessible_ids:
+                members[group_id].append((str(client_id), client_name))
+
+    return [
+        ClientGroupResponse.model_construct(
+            id=str(group.id),
+            name=group.name,
+            is_active=group.is_active,
+            client_ids=[cid for cid, _ in members[group.id]],
+            client_names=[name for _, name in members[group.id]],
+            created_at=group.created_at,
+            updated_at=group.updated_at,
+        )
+        for group in groups
+    ]
 
 
 def _build_group_response(db: Session, group: ClientGroup, accessible_ids: set = None) -> ClientGroupResponse:
     """Build a ClientGroupResponse, optionally filtering to accessible clients."""
-    member_rows = db.query(
-        client_group_members.c.client_id
-    ).filter(
-        client_group_members.c.client_group_id == group.id
-    ).all()
-    all_client_ids = [str(r[0]) for r in member_rows]
-
-    # Filter to accessible clients if provided
-    if accessible_ids is not None:
-        client_ids = [cid for cid in all_client_ids if cid in accessible_ids]
-    else:
-        client_ids = all_client_ids
-
-    # Resolve client names
-    client_names = []
-    if client_ids:
-        name_rows = db.query(Client.id, Client.name).filter(
-            Client.id.in_(client_ids)
-        ).all()
-        name_map = {str(r[0]): r[1] for r in name_rows}
-        client_names = [name_map.get(cid, "Unknown") for cid in client_ids]
+    return _build_group_responses(db, [group], accessible_ids)[0]
+
 
-    return ClientGroupResponse(
-        id=str(group.id),
-        name=group.name,
-        is_active=group.is_active,
-        client_ids=client_ids,
-        client_names=client_names,
-        created_at=group.created_at,
-        updated_at=group.updated_at,
-    )
+def _insert_members(db: Session, group_id, client_ids: set) -> None:
+    """Add clients (UUIDs) to a group with one executemany INSERT."""
+    if not client_ids:
+        return
+    db.execute(client_group_members.insert(), [
+        {"id": uuid_lib.uuid4(), "client_group_id": group_id, "client_id": cid}
+        for cid in client_ids
+    ])
 
 
 @router.get("", response_model=ClientGroupList)
-async def list_client_groups(
+def list_client_groups(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """List client groups. Non-admin users only see groups with clients they can access."""
+    key = org_response_key(current_user.organization_id, "client_groups", current_user.id)
+    return cached_response(key, lambda: _list_client_groups(db, current_user))
+
+
+def _list_client_groups(db: Session, current_user: User) -> ClientGroupList:
     accessible_ids = _get_user_accessible_client_ids(db, current_user)
 
-    groups = db.query(ClientGroup).filter(
+    groups = db.query(*_GROUP_COLUMNS).filter(
         ClientGroup.organization_id == current_user.organization_id,
         ClientGroup.is_active == True,  # noqa: E712
     ).order_by(ClientGroup.name).all()
 
-    result = []
-    for group in groups:
-        resp = _build_group_response(db, group, accessible_ids)
-        # Only include groups that have at least one accessible client
-        if resp.client_ids:
-            result.append(resp)
+    # Only include groups that have at least one accessible client
+    result = [
+        resp for resp in _build_group_responses(db, groups, accessible_ids)
+        if resp.client_ids
+    ]
 
-    return ClientGroupList(client_groups=result, total=len(result))
+    return ClientGroupList.model_construct(client_groups=result, total=len(result))
 
 
 @router.post("", response_model=ClientGroupResponse, status_code=status.HTTP_201_CREATED)
-async def create_client_group(
+def create_client_group(
     data: ClientGroupCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin", "superadmin"])),
 ):
     """Create a new client group (admin only)."""
-    group = ClientGroup(
-        organization_id=current_user.organization_id,
-        name=data.name,
-    )
-    db.add(group)
-    db.flush()
-
-    for cid in data.client_ids:
-        db.execute(client_group_members.insert().values(
-            id=uuid_lib.uuid4(),
-            client_group_id=group.id,
-            client_id=uuid_lib.UUID(cid),
-        ))
+    group = db.execute(
+        insert(ClientGroup).values(
+            organization_id=current_user.organization_id,
+            name=data.name,
+        ).returning(*_GROUP_COLUMNS)
+    ).one()
+
+    _insert_members(db, group.id, {uuid_lib.UUID(cid) for cid in data.client_ids})
 
     db.commit()
-    db.refresh(group)
+    bump_org_cache_version(current_user.organization_id)
     return _build_group_response(db, group)
 
 
 @router.patch("/{group_id}", response_model=ClientGroupResponse)
-async def update_client_group(
+def update_client_group(
     group_id: str,
     data: ClientGroupUpdate,
     db: Session = Depends(get_db),
@@ -156,26 +214,31 @@ async def update_client_group(
         group.name = data.name
 
     if data.client_ids is not None:
-        # Replace all members
-        db.execute(
-            client_group_members.delete().where(
+        # Replace members, touching only the rows that actually change
+        new_ids = {uuid_lib.UUID(cid) for cid in data.client_ids}
+        existing_ids = {
+            r[0] for r in db.query(client_group_members.c.client_id).filter(
                 client_group_members.c.client_group_id == group.id
+            ).all()
+        }
+        removed_ids = existing_ids - new_ids
+        if removed_ids:
+            db.execute(
+                client_group_members.delete().where(
+                    client_group_members.c.client_group_id == group.id,
+                    client_group_members.c.client_id.in_(removed_ids),
+                )
             )
-        )
-        for cid in data.client_ids:
-            db.execute(client_group_members.insert().values(
-                id=uuid_lib.uuid4(),
-                client_group_id=group.id,
-                client_id=uuid_lib.UUID(cid),
-            ))
+        _insert_members(db, group.id, new_ids - existing_ids)
 
     db.commit()
+    bump_org_cache_version(current_user.organization_id)
     db.refresh(group)
     return _build_group_response(db, group)
 
 
 @router.delete("/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_client_group(
+def delete_client_group(
     group_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin", "superadmin"])),
@@ -191,4 +254,5 @@ async def delete_client_group(
 
     db.delete(group)
     db.commit()
+    bump_org_cache_version(current_user.organization_id)
     return None
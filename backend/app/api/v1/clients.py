@@ -4,13 +4,17 @@ Clients API Endpoints
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, tuple_
 from uuid import UUID
 
 from app.database import get_db
 from app.dependencies import get_current_user, require_role
-from app.models.user import User, UserRole
+from app.models.user import User
 from app.models.client import Client, client_locations, user_clients
 from app.models.location import Location
+from app.api.v1.client_groups import invalidate_accessible_client_ids
+from app.models.square_account import SquareAccount
+from app.utils.cache import bump_org_cache_version, cached_response, org_response_key
 from app.schemas.client import (
     ClientCreate,
     ClientUpdate,
@@ -22,23 +26,77 @@ from app.schemas.client import (
 router = APIRouter(prefix="/clients", tags=["clients"])
 
 
+# Columns selected for client responses
+_CLIENT_COLUMNS = (
+    Client.id,
+    Client.organization_id,
+    Client.name,
+    Client.email,
+    Client.is_active,
+    Client.category_keywords,
+    Client.created_at,
+    Client.updated_at,
+)
+
+
+def _client_response(client, location_count: int) -> ClientResponse:
+    """Build a ClientResponse from a Client instance or row."""
+    return ClientResponse.model_construct(
+        id=str(client.id),
+        organization_id=str(client.organization_id),
+        name=client.name,
+        email=client.email,
+        is_active=client.is_active,
+        category_keywords=client.category_keywords,
+        created_at=client.created_at,
+        updated_at=client.updated_at,
+        location_count=location_count,
+    )
+
+
 @router.get("", response_model=ClientList)
-async def list_clients(
+def list_clients(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    after_name: Optional[str] = Query(None, description="Name of the last client on the previous page"),
+    after_id: Optional[UUID] = Query(None, description="ID of the last client on the previous page"),
 ):
     """
-    List all clients for the organization.
+    List all clients for the organization, ordered by name.
     Non-admin users with assigned clients only see their assigned clients.
+    Pass the last client's name and id as after_name/after_id to fetch the
+    next page; skip is still honoured when they are omitted.
     """
-    query = db.query(Client).filter(
+    if (after_name is None) != (after_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after_name and after_id must be given together"
+        )
+
+    key = org_response_key(
+        current_user.organization_id, "clients", current_user.id, skip, limit, after_name, after_id
+    )
+    return cached_response(
+        key, lambda: _list_clients(db, current_user, skip, limit, after_name, after_id)
+    )
+
+
+def _list_clients(
+    db: Session,
+    current_user: User,
+    skip: int,
+    limit: int,
+    after_name: Optional[str],
+    after_id: Optional[UUID],
+) -> ClientList:
+    query = db.query(*_CLIENT_COLUMNS).filter(
         Client.organization_id == current_user.organization_id
     )
 
     # Scope for non-admin users
-    role_val = current_user.role.value if isinstance(current_user.role, UserRole) else current_user.role
+    role_val = current_user.role_value
     MULTI_CLIENT_ROLES = {"reporting", "manager"}
     if role_val in MULTI_CLIENT_ROLES:
         allowed_ids = db.query(user_clients.c.client_id).filter(
@@ -56,33 +114,41 @@ async def list_clients(
     elif role_val == "client" and current_user.client_id:
         query = query.filter(Client.id == current_user.client_id)
 
-    total = query.count()
-    clients = query.offset(skip).limit(limit).all()
-
-    # Count locations for each client
-    clients_data = []
-    for client in clients:
-        location_count = db.query(client_locations).filter(
-            client_locations.c.client_id == client.id
-        ).count()
-
-        clients_data.append(ClientResponse(
-            id=str(client.id),
-            organization_id=str(client.organization_id),
-            name=client.name,
-            email=client.email,
-            is_active=client.is_active,
-            category_keywords=client.category_keywords,
-            created_at=client.created_at,
-            updated_at=client.updated_at,
-            location_count=location_count
-        ))
-
-    return ClientList(clients=clients_data, total=total)
+    query = query.order_by(Client.name, Client.id)
+    if after_id is not None:
+        # Keyset pagination: seek past the last client of the previous page.
+        # The seek filter would also narrow a window count, so total is counted separately.
+        total = query.count()
+        clients = query.filter(
+            tuple_(Client.name, Client.id) > (after_name, after_id)
+        ).limit(limit).all()
+    else:
+        # count() OVER () returns the total alongside the page in one query
+        clients = query.add_columns(
+            func.count().over().label("total")
+        ).offset(skip).limit(limit).all()
+        if clients:
+            total = clients[0].total
+        else:
+            # An empty page past the end carries no window count
+            total = query.count() if skip else 0
+
+    # Count locations for all listed clients in one grouped query
+    location_counts = dict(
+        db.query(client_locations.c.client_id, func.count()).filter(
+            client_locations.c.client_id.in_([c.id for c in clients])
+        ).group_by(client_locations.c.client_id).all()
+    ) if clients else {}
+
+    clients_data = [
+        _client_response(client, location_counts.get(client.id, 0))
+        for client in clients
+    ]
+    return ClientList.model_construct(clients=clients_data, total=total)
 
 
 @router.post("", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
-async def create_client(
+def create_client(
     client_data: ClientCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin", "superadmin"]))
@@ -90,33 +156,25 @@ async def create_client(
     """
     Create a new client (Admin only)
     """
-    client = Client(
-        organization_id=current_user.organization_id,
-        name=client_data.name,
-        email=client_data.email,
-        is_active=client_data.is_active,
-        category_keywords=client_data.category_keywords
-    )
+    client = db.execute(
+        insert(Client).values(
+            organization_id=current_user.organization_id,
+            name=client_data.name,
+            email=client_data.email,
+            is_active=client_data.is_active,
+            category_keywords=client_data.category_keywords
+        ).returning(*_CLIENT_COLUMNS)
+    ).one()
 
-    db.add(client)
     db.commit()
-    db.refresh(client)
+    invalidate_accessible_client_ids(organization_id=current_user.organization_id)
+    bump_org_cache_version(current_user.organization_id)
 
-    return ClientResponse(
-        id=str(client.id),
-        organization_id=str(client.organization_id),
-        name=client.name,
-        email=client.email,
-        is_active=client.is_active,
-        category_keywords=client.category_keywords,
-        created_at=client.created_at,
-        updated_at=client.updated_at,
-        location_count=0
-    )
+    return _client_response(client, 0)
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
-async def get_client(
+def get_client(
     client_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -135,25 +193,15 @@ async def get_client(
             detail="Client not found"
         )
 
-    location_count = db.query(client_locations).filter(
+    location_count = db.query(func.count(client_locations.c.location_id)).filter(
         client_locations.c.client_id == client.id
-    ).count()
+    ).scalar()
 
-    return ClientResponse(
-        id=str(client.id),
-        organization_id=str(client.organization_id),
-        name=client.name,
-        email=client.email,
-        is_active=client.is_active,
-        category_keywords=client.category_keywords,
-        created_at=client.created_at,
-        updated_at=client.updated_at,
-        location_count=location_count
-    )
+    return _client_response(client, location_count)
 
 
 @router.patch("/{client_id}", response_model=ClientResponse)
-async def update_client(
+def update_client(
     client_id: str,
     client_data: ClientUpdate,
     db: Session = Depends(get_db),
@@ -186,6 +234,7 @@ async def update_client(
         keywords_changed = True
 
     db.commit()
+    bump_org_cache_version(current_user.organization_id)
     db.refresh(client)
 
     # Recompute product mappings if keywords changed
@@ -193,25 +242,15 @@ async def update_client(
         from app.services.client_catalog_service import recompute_client_mappings
         recompute_client_mappings(db, client_id=client_id)
 
-    location_count = db.query(client_locations).filter(
+    location_count = db.query(func.count(client_locations.c.location_id)).filter(
         client_locations.c.client_id == client.id
-    ).count()
+    ).scalar()
 
-    return ClientResponse(
-        id=str(client.id),
-        organization_id=str(client.organization_id),
-        name=client.name,
-        email=client.email,
-        is_active=client.is_active,
-        category_keywords=client.category_keywords,
-        created_at=client.created_at,
-        updated_at=client.updated_at,
-        location_count=location_count
-    )
+    return _client_response(client, location_count)
 
 
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_client(
+def delete_client(
     client_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin", "superadmin"]))
@@ -232,11 +271,13 @@ async def delete_client(
 
     db.delete(client)
     db.commit()
+    invalidate_accessible_client_ids(organization_id=current_user.organization_id)
+    bump_org_cache_version(current_user.organization_id)
     return None
 
 
 @router.post("/{client_id}/locations", status_code=status.HTTP_200_OK)
-async def assign_locations_to_client(
+def assign_locations_to_client(
     client_id: str,
     assignment: ClientLocationAssignment,
     db: Session = Depends(get_db),
@@ -261,28 +302,30 @@ async def assign_locations_to_client(
         client_locations.delete().where(client_locations.c.client_id == client_id)
     )
 
-    # Add new assignments
-    for location_id in assignment.location_ids:
-        # Verify location belongs to organization
-        location = db.query(Location).join(Location.square_account).filter(
-            Location.id == location_id,
-        ).first()
-
-        if location:
-            db.execute(
-                client_locations.insert().values(
-                    client_id=client_id,
-                    location_id=location_id
-                )
-            )
+    # Add new assignments, keeping only locations that belong to the organization
+    valid_location_ids = []
+    if assignment.location_ids:
+        valid_location_ids = [
+            r[0] for r in db.query(Location.id).join(Location.square_account).filter(
+                Location.id.in_(assignment.location_ids),
+                SquareAccount.organization_id == current_user.organization_id,
+            ).all()
+        ]
+
+    if valid_location_ids:
+        db.execute(client_locations.insert(), [
+            {"client_id": client_id, "location_id": location_id}
+            for location_id in valid_location_ids
+        ])
 
     db.commit()
+    bump_org_cache_version(current_user.organization_id)
 
     return {"message": "Locations assigned successfully"}
 
 
 @router.get("/{client_id}/locations")
-async def get_client_locations(
+def get_client_locations(
     client_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -290,6 +333,11 @@ async def get_client_locations(
     """
     Get all locations assigned to a client
     """
+    key = org_response_key(current_user.organization_id, "client_locations", client_id)
+    return cached_response(key, lambda: _get_client_locations(db, current_user, client_id))
+
+
+def _get_client_locations(db: Session, current_user: User, client_id: str) -> dict:
     client = db.query(Client).filter(
         Client.id == client_id,
         Client.organization_id == current_user.organization_id
@@ -326,7 +374,7 @@ async def get_client_locations(
 
 
 @router.put("/{client_id}/category-keywords", status_code=status.HTTP_200_OK)
-async def update_category_keywords(
+def update_category_keywords(
     client_id: str,
     body: dict,
     db: Session = Depends(get_db),
@@ -351,6 +399,7 @@ async def update_category_keywords(
     client.category_keywords = keywords if keywords else None
 
     db.commit()
+    bump_org_cache_version(current_user.organization_id)
     db.refresh(client)
 
     # Recompute pre-computed product mappings for this client
@@ -2,9 +2,10 @@
 Dashboards API Endpoints
 """
 from typing import Optional, List
+from collections import defaultdict
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, exists, insert, or_
 
 from app.database import get_db
 from app.dependencies import get_current_user, require_role
@@ -12,6 +13,7 @@ from app.models.user import User
 from app.models.dashboard import Dashboard, DashboardLocation, UserDashboardPermission
 from app.models.location import Location
 from app.models.square_account import SquareAccount
+from app.utils.cache import bump_org_cache_version, cached_response, org_response_key
 from app.schemas.dashboard import (
     DashboardCreate,
     DashboardUpdate,
@@ -24,8 +26,50 @@ from app.schemas.dashboard import (
 router = APIRouter(tags=["dashboards"])
 
 
+# Columns selected for dashboard responses
+_DASHBOARD_COLUMNS = (
+    Dashboard.id,
+    Dashboard.organization_id,
+    Dashboard.name,
+    Dashboard.description,
+    Dashboard.config,
+    Dashboard.created_by,
+    Dashboard.is_template,
+    Dashboard.created_at,
+    Dashboard.updated_at,
+)
+
+
+def _dashboard_response(dashboard, location_ids: Optional[List[str]] = None) -> DashboardResponse:
+    """Build a DashboardResponse; location_ids defaults to the instance's dashboard_locations."""
+    if location_ids is None:
+        location_ids = [str(dl.location_id) for dl in dashboard.dashboard_locations]
+    return DashboardResponse.model_construct(
+        id=str(dashboard.id),
+        organization_id=str(dashboard.organization_id),
+        name=dashboard.name,
+        description=dashboard.description,
+        config=dashboard.config,
+        created_by=str(dashboard.created_by),
+        is_template=dashboard.is_template,
+        created_at=dashboard.created_at,
+        updated_at=dashboard.updated_at,
+        location_ids=location_ids,
+    )
+
+
+def _org_location_ids(db: Session, organization_id, location_ids: List[str]) -> set:
+    """The subset of location_ids (as UUIDs) that belong to the organization, in one query."""
+    return {
+        r[0] for r in db.query(Location.id).join(SquareAccount).filter(
+            SquareAccount.organization_id == organization_id,
+            Location.id.in_(location_ids)
+        ).all()
+    }
+
+
 @router.get("/", response_model=DashboardList)
-async def list_dashboards(
+def list_dashboards(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     skip: int = Query(0, ge=0),
@@ -34,9 +78,15 @@ async def list_dashboards(
     """
     List dashboards accessible by current user
     """
+    key = org_response_key(current_user.organization_id, "dashboards", current_user.id, skip, limit)
+    return cached_response(key, lambda: _list_dashboards(db, current_user, skip, limit))
+
+
+def _list_dashboards(db: Session, current_user: User, skip: int, limit: int) -> DashboardList:
     # Admins see all org dashboards, others see only their permitted dashboards
+    # Plain rows rather than Dashboard instances; locations are fetched separately below
     if current_user.role in ["admin", "superadmin"]:
-        query = db.query(Dashboard).filter(
+        query = db.query(*_DASHBOARD_COLUMNS).filter(
             Dashboard.organization_id == current_user.organization_id
         )
     else:
@@ -45,7 +95,7 @@ async def list_dashboards(
             UserDashboardPermission.user_id == current_user.id
         ).subquery()
 
-        query = db.query(Dashboard).filter(
+        query = db.query(*_DASHBOARD_COLUMNS).filter(
             and_(
                 Dashboard.organization_id == current_user.organization_id,
                 or_(
@@ -58,31 +108,24 @@ async def list_dashboards(
     total = query.count()
     dashboards = query.offset(skip).limit(limit).all()
 
-    # Convert to response with location IDs
-    dashboards_data = []
-    for dash in dashboards:
-        location_ids = [str(dl.location_id) for dl in dash.dashboard_locations]
-        dashboards_data.append({
-            "id": str(dash.id),
-            "organization_id": str(dash.organization_id),
-            "name": dash.name,
-            "description": dash.description,
-            "config": dash.config,
-            "created_by": str(dash.created_by),
-            "is_template": dash.is_template,
-            "created_at": dash.created_at,
-            "updated_at": dash.updated_at,
-            "location_ids": location_ids,
-        })
-
-    return DashboardList(
-        dashboards=[DashboardResponse(**d) for d in dashboards_data],
+    # Load every listed dashboard's locations in one extra query
+    location_ids = defaultdict(list)
+    if dashboards:
+        for dashboard_id, location_id in db.query(
+            DashboardLocation.dashboard_id, DashboardLocation.location_id
+        ).filter(
+            DashboardLocation.dashboard_id.in_([d.id for d in dashboards])
+        ).all():
+            location_ids[dashboard_id].append(str(location_id))
+
+    return DashboardList.model_construct(
+        dashboards=[_dashboard_response(dash, location_ids[dash.id]) for dash in dashboards],
         total=total
     )
 
 
 @router.post("/", response_model=DashboardResponse, status_code=status.HTTP_201_CREATED)
-async def create_dashboard(
+def create_dashboard(
     dashboard_create: DashboardCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -91,56 +134,35 @@ async def create_dashboard(
     Create a new dashboard
     """
     # Create dashboard
-    dashboard = Dashboard(
-        organization_id=current_user.organization_id,
-        name=dashboard_create.name,
-        description=dashboard_create.description,
-        config=dashboard_create.config,
-        created_by=current_user.id,
-        is_template=False,
-    )
-    db.add(dashboard)
-    db.flush()
-
-    # Associate locations if provided
+    dashboard = db.execute(
+        insert(Dashboard).values(
+            organization_id=current_user.organization_id,
+            name=dashboard_create.name,
+            description=dashboard_create.description,
+            config=dashboard_create.config,
+            created_by=current_user.id,
+            is_template=False,
+        ).returning(*_DASHBOARD_COLUMNS)
+    ).one()
+
+    # Associate locations if provided, keeping only the organization's own
+    location_ids = set()
     if dashboard_create.location_ids:
-        # Verify user has access to these locations
-        accessible_locations = db.query(Location.id).join(SquareAccount).filter(
-            SquareAccount.organization_id == current_user.organization_id,
-            Location.id.in_(dashboard_create.location_ids)
-        ).all()
-        accessible_location_ids = [str(loc.id) for loc in accessible_locations]
-
-        for loc_id in dashboard_create.location_ids:
-            if loc_id in accessible_location_ids:
-                dash_loc = DashboardLocation(
-                    dashboard_id=dashboard.id,
-                    location_id=loc_id
-                )
-                db.add(dash_loc)
+        location_ids = _org_location_ids(db, current_user.organization_id, dashboard_create.location_ids)
+        if location_ids:
+            db.execute(DashboardLocation.__table__.insert(), [
+                {"dashboard_id": dashboard.id, "location_id": loc_id}
+                for loc_id in location_ids
+            ])
 
     db.commit()
-    db.refresh(dashboard)
+    bump_org_cache_version(current_user.organization_id)
 
-    # Get location IDs
-    location_ids = [str(dl.location_id) for dl in dashboard.dashboard_locations]
-
-    return DashboardResponse(
-        id=str(dashboard.id),
-        organization_id=str(dashboard.organization_id),
-        name=dashboard.name,
-        description=dashboard.description,
-        config=dashboard.config,
-        created_by=str(dashboard.created_by),
-        is_template=dashboard.is_template,
-        created_at=dashboard.created_at,
-        updated_at=dashboard.updated_at,
-        location_ids=location_ids,
-    )
+    return _dashboard_response(dashboard, [str(loc_id) for loc_id in location_ids])
 
 
 @router.get("/{dashboard_id}", response_model=DashboardResponse)
-async def get_dashboard(
+def get_dashboard(
     dashboard_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -148,49 +170,38 @@ async def get_dashboard(
     """
     Get dashboard by ID
     """
-    dashboard = db.query(Dashboard).filter(
+    # Resolve the caller's explicit permission in the same query as the dashboard
+    has_permission = exists().where(
+        UserDashboardPermission.user_id == current_user.id,
+        UserDashboardPermission.dashboard_id == Dashboard.id,
+    ).label("has_permission")
+    row = db.query(Dashboard, has_permission).options(
+        selectinload(Dashboard.dashboard_locations)
+    ).filter(
         Dashboard.id == dashboard_id,
         Dashboard.organization_id == current_user.organization_id
     ).first()
 
-    if not dashboard:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dashboard not found"
         )
+    dashboard, permitted = row
 
     # Check permission
     if current_user.role not in ["admin", "superadmin"]:
-        has_permission = db.query(UserDashboardPermission).filter(
-            UserDashboardPermission.user_id == current_user.id,
-            UserDashboardPermission.dashboard_id == dashboard_id
-        ).first()
-
-        if not has_permission and dashboard.created_by != current_user.id:
+        if not permitted and dashboard.created_by != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
             )
 
-    # Get location IDs
-    location_ids = [str(dl.location_id) for dl in dashboard.dashboard_locations]
-
-    return DashboardResponse(
-        id=str(dashboard.id),
-        organization_id=str(dashboard.organization_id),
-        name=dashboard.name,
-        description=dashboard.description,
-        config=dashboard.config,
-        created_by=str(dashboard.created_by),
-        is_template=dashboard.is_template,
-        created_at=dashboard.created_at,
-        updated_at=dashboard.updated_at,
-        location_ids=location_ids,
-    )
+    return _dashboard_response(dashboard)
 
 
 @router.patch("/{dashboard_id}", response_model=DashboardResponse)
-async def update_dashboard(
+def update_dashboard(
     dashboard_id: str,
     dashboard_update: DashboardUpdate,
     db: Session = Depends(get_db),
@@ -227,48 +238,31 @@ async def update_dashboard(
 
     # Update locations if provided
     if dashboard_update.location_ids is not None:
-        # Remove existing locations
-        db.query(DashboardLocation).filter(
-            DashboardLocation.dashboard_id == dashboard_id
-        ).delete()
-
-        # Add new locations
-        accessible_locations = db.query(Location.id).join(SquareAccount).filter(
-            SquareAccount.organization_id == current_user.organization_id,
-            Location.id.in_(dashboard_update.location_ids)
-        ).all()
-        accessible_location_ids = [str(loc.id) for loc in accessible_locations]
-
-        for loc_id in dashboard_update.location_ids:
-            if loc_id in accessible_location_ids:
-                dash_loc = DashboardLocation(
-                    dashboard_id=dashboard.id,
-                    location_id=loc_id
-                )
-                db.add(dash_loc)
+        new_location_ids = _org_location_ids(db, current_user.organization_id, dashboard_update.location_ids)
+
+        # Only delete removed locations and add new ones; delete-orphan
+        # cascade removes rows dropped from the collection
+        existing_location_ids = set()
+        for dash_loc in list(dashboard.dashboard_locations):
+            if dash_loc.location_id in new_location_ids:
+                existing_location_ids.add(dash_loc.location_id)
+            else:
+                dashboard.dashboard_locations.remove(dash_loc)
+
+        dashboard.dashboard_locations.extend(
+            DashboardLocation(location_id=loc_id)
+            for loc_id in new_location_ids - existing_location_ids
+        )
 
     db.commit()
+    bump_org_cache_version(current_user.organization_id)
     db.refresh(dashboard)
 
-    # Get location IDs
-    location_ids = [str(dl.location_id) for dl in dashboard.dashboard_locations]
-
-    return DashboardResponse(
-        id=str(dashboard.id),
-        organization_id=str(dashboard.organization_id),
-        name=dashboard.name,
-        description=dashboard.description,
-        config=dashboard.config,
-        created_by=str(dashboard.created_by),
-        is_template=dashboard.is_template,
-        created_at=dashboard.created_at,
-        updated_at=dashboard.updated_at,
-        location_ids=location_ids,
-    )
+    return _dashboard_response(dashboard)
 
 
 @router.delete("/{dashboard_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_dashboard(
+def delete_dashboard(
     dashboard_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -296,3 +290,4 @@ async def delete_dashboard(
 
     db.delete(dashboard)
     db.commit()
+    bump_org_cache_version(current_user.organization_id)
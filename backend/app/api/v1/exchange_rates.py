@@ -1,13 +1,17 @@
 """
 Exchange Rates API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, selectinload
 
 from app.database import get_db
 from app.dependencies import get_current_user, require_role
 from app.models.user import User
 from app.models.exchange_rate import ExchangeRate
+from app.utils.cache import cached_response
+from app.utils.responses import etag_for, not_modified
 from app.schemas.exchange_rate import (
     ExchangeRateCreate,
     ExchangeRateUpdate,
@@ -18,20 +22,55 @@ from app.schemas.exchange_rate import (
 router = APIRouter(prefix="/exchange-rates", tags=["exchange-rates"])
 
 
+def _rates_key(organization_id, etag: str) -> str:
+    """
+    Redis key for an organization's cached rate list. It includes the ETag, so
+    any rate write moves readers to a new key and the body always matches its ETag.
+    """
+    return f"exchange_rates:{organization_id}:{etag}"
+
+
 @router.get("", response_model=ExchangeRateList)
-async def list_exchange_rates(
+def list_exchange_rates(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """List all exchange rates for the organization."""
-    rates = db.query(ExchangeRate).filter(
+    """
+    List all exchange rates for the organization.
+    Answers 304 when If-None-Match still matches the org's rates.
+    """
+    # Row count catches deletes, max(updated_at) catches inserts and edits
+    count, last_updated = db.query(
+        func.count(ExchangeRate.id), func.max(ExchangeRate.updated_at)
+    ).filter(
         ExchangeRate.organization_id == current_user.organization_id
+    ).one()
+    etag = etag_for(current_user.organization_id, count, last_updated)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    response.headers["ETag"] = etag
+
+    return cached_response(
+        _rates_key(current_user.organization_id, etag),
+        lambda: _list_exchange_rates(db, current_user.organization_id),
+    )
+
+
+def _list_exchange_rates(db: Session, organization_id) -> ExchangeRateList:
+    # Load every rate's updater in one extra query rather than one per row
+    rates = db.query(ExchangeRate).options(
+        selectinload(ExchangeRate.updater)
+    ).filter(
+        ExchangeRate.organization_id == organization_id
     ).order_by(ExchangeRate.from_currency).all()
 
     rates_data = []
     for r in rates:
         updater_name = r.updater.full_name if r.updater else None
-        rates_data.append(ExchangeRateResponse(
+        rates_data.append(ExchangeRateResponse.model_construct(
             id=str(r.id),
             from_currency=r.from_currency,
             to_currency=r.to_currency,
@@ -40,11 +79,11 @@ async def list_exchange_rates(
             updated_by_name=updater_name,
         ))
 
-    return ExchangeRateList(rates=rates_data)
+    return ExchangeRateList.model_construct(rates=rates_data)
 
 
 @router.post("", response_model=ExchangeRateResponse, status_code=status.HTTP_201_CREATED)
-async def create_exchange_rate(
+def create_exchange_rate(
     data: ExchangeRateCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin", "superadmin"])),
@@ -52,29 +91,32 @@ async def create_exchange_rate(
     """Create a new exchange rate (Admin only)."""
     from_currency = data.from_currency.upper().strip()
 
-    # Check for duplicate
-    existing = db.query(ExchangeRate).filter(
-        ExchangeRate.organization_id == current_user.organization_id,
-        ExchangeRate.from_currency == from_currency,
-        ExchangeRate.to_currency == "GBP",
+    # uq_org_from_to_currency rejects duplicates; RETURNING is empty when it does
+    rate = db.execute(
+        pg_insert(ExchangeRate).values(
+            organization_id=current_user.organization_id,
+            from_currency=from_currency,
+            to_currency="GBP",
+            rate=data.rate,
+            updated_by=current_user.id,
+        ).on_conflict_do_nothing(
+            index_elements=["organization_id", "from_currency", "to_currency"]
+        ).returning(
+            ExchangeRate.id,
+            ExchangeRate.from_currency,
+            ExchangeRate.to_currency,
+            ExchangeRate.rate,
+            ExchangeRate.updated_at,
+        )
     ).first()
 
-    if existing:
+    if rate is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Exchange rate for {from_currency} -> GBP already exists. Use PUT to update.",
         )
 
-    rate = ExchangeRate(
-        organization_id=current_user.organization_id,
-        from_currency=from_currency,
-        to_currency="GBP",
-        rate=data.rate,
-        updated_by=current_user.id,
-    )
-    db.add(rate)
     db.commit()
-    db.refresh(rate)
 
     return ExchangeRateResponse(
         id=str(rate.id),
@@ -87,7 +129,7 @@ async def create_exchange_rate(
 
 
 @router.put("/{rate_id}", response_model=ExchangeRateResponse)
-async def update_exchange_rate(
+def update_exchange_rate(
     rate_id: str,
     data: ExchangeRateUpdate,
     db: Session = Depends(get_db),
@@ -121,7 +163,7 @@ async def update_exchange_rate(
 
 
 @router.delete("/{rate_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_exchange_rate(
+def delete_exchange_rate(
     rate_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin", "superadmin"])),
@@ -2,20 +2,25 @@
 Footfall API Endpoints
 """
 from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, distinct
+from sqlalchemy import and_, delete, desc, exists, func, distinct, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
 from datetime import date, timedelta
+import hashlib
 import uuid as uuid_lib
 
 from app.database import get_db
 from app.dependencies import get_current_user, require_permission
-from app.models.user import User
+from app.models.user import User, user_locations
 from app.models.footfall import FootfallEntry
 from app.models.location import Location
 from app.models.client import client_locations, user_clients
 from app.models.square_account import SquareAccount
-from app.models.role_permission import RolePermission
+from app.services.location_cache import get_org_locations
+from app.services.permission_cache import get_role_permissions
+from app.utils.cache import cache_get, cache_set, org_response_key
+from app.utils.responses import etag_for, not_modified
 from app.schemas.footfall import (
     FootfallCreate, FootfallUpdate, FootfallResponse, FootfallListResponse,
 )
@@ -24,30 +29,50 @@ router = APIRouter(tags=["footfall"])
 
 ADMIN_ROLES = ("superadmin", "admin")
 
+# Seconds a coverage result is served from Redis
+COVERAGE_TTL = 30
 
-def _get_accessible_location_ids(db: Session, user: User) -> list:
+
+# Seconds a user's accessible footfall locations are served from Redis
+ACCESSIBLE_LOCATIONS_TTL = 30
+
+
+def _get_accessible_location_ids(db: Session, user: User) -> frozenset:
+    """
+    Get the set of location UUIDs the user can access, cached in Redis for
+    ACCESSIBLE_LOCATIONS_TTL. The key carries the organization's cache
+    version, so location, client and user changes invalidate it.
+    """
+    key = org_response_key(user.organization_id, "footfall_locations", user.id)
+    cached = cache_get(key)
+    if cached is not None:
+        return frozenset(uuid_lib.UUID(lid) for lid in cached)
+
+    location_ids = frozenset(_load_accessible_location_ids(db, user))
+    cache_set(key, [str(lid) for lid in location_ids], ACCESSIBLE_LOCATIONS_TTL)
+    return location_ids
+
+
+def _load_accessible_location_ids(db: Session, user: User) -> list:
     """Get location UUIDs the user can access, scoped by role and client assignments."""
+    # Core selects of a single column: scalars() skips ORM row bookkeeping
     if user.role in ADMIN_ROLES:
-        rows = db.query(Location.id).join(SquareAccount).filter(
-            SquareAccount.organization_id == user.organization_id
-        ).all()
-        return [r[0] for r in rows]
+        return db.execute(
+            select(Location.id).join(SquareAccount).where(
+                SquareAccount.organization_id == user.organization_id
+            )
+        ).scalars().all()
 
     # Location-based roles (store_manager): direct location assignment
-    role_val = user.role.value if hasattr(user.role, 'value') else user.role
-    if role_val == "store_manager":
-        from app.models.user import user_locations
-        rows = db.query(user_locations.c.location_id).filter(
-            user_locations.c.user_id == user.id
-        ).all()
-        return [r[0] for r in rows]
+    if user.role_value == "store_manager":
+        return db.execute(
+            select(user_locations.c.location_id).where(user_locations.c.user_id == user.id)
+        ).scalars().all()
 
     # Multi-client roles: use assigned_clients -> client_locations
-    assigned_client_ids = [
-        r[0] for r in db.query(user_clients.c.client_id).filter(
-            user_clients.c.user_id == user.id
-        ).all()
-    ]
+    assigned_client_ids = db.execute(
+        select(user_clients.c.client_id).where(user_clients.c.user_id == user.id)
+    ).scalars().all()
 
     # Fallback: single client_id
     if not assigned_client_ids and user.client_id:
@@ -56,27 +81,37 @@ def _get_accessible_location_ids(db: Session, user: User) -> list:
     if not assigned_client_ids:
         return []
 
-    rows = db.query(client_locations.c.location_id).filter(
-        client_locations.c.client_id.in_(assigned_client_ids)
-    ).all()
-    return [r[0] for r in rows]
+    return db.execute(
+        select(client_locations.c.location_id).where(
+            client_locations.c.client_id.in_(assigned_client_ids)
+        )
+    ).scalars().all()
 
 
 def _has_manage_permission(db: Session, user: User) -> bool:
     """Check if user has feature:manage_footfall."""
     if user.role in ADMIN_ROLES:
         return True
-    perm = db.query(RolePermission).filter(
-        RolePermission.organization_id == user.organization_id,
-        RolePermission.role == user.role,
-        RolePermission.permission_key == "feature:manage_footfall",
-        RolePermission.granted == True,  # noqa: E712
-    ).first()
-    return perm is not None
+    return "feature:manage_footfall" in get_role_permissions(db, user.organization_id, user.role_value)
+
+
+# Columns returned for footfall responses
+_ENTRY_COLUMNS = (
+    FootfallEntry.id,
+    FootfallEntry.organization_id,
+    FootfallEntry.location_id,
+    FootfallEntry.date,
+    FootfallEntry.count,
+    FootfallEntry.created_by,
+    FootfallEntry.updated_by,
+    FootfallEntry.created_at,
+    FootfallEntry.updated_at,
+)
 
 
-def _entry_to_response(entry: FootfallEntry, location_name: str = None, creator_name: str = None) -> FootfallResponse:
-    return FootfallResponse(
+def _entry_to_response(entry, location_name: str = None, creator_name: str = None) -> FootfallResponse:
+    """Build a FootfallResponse from an entry instance or row."""
+    return FootfallResponse.model_construct(
         id=str(entry.id),
         organization_id=str(entry.organization_id),
         location_id=str(entry.location_id),
@@ -92,10 +127,10 @@ def _entry_to_response(entry: FootfallEntry, location_name: str = None, creator_
 
 
 @router.get("/", response_model=FootfallListResponse)
-async def list_footfall_entries(
+def list_footfall_entries(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("page:footfall")),
-    location_id: Optional[str] = Query(None),
+    location_id: Optional[uuid_lib.UUID] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     page: int = Query(1, ge=1),
@@ -103,7 +138,7 @@ async def list_footfall_entries(
 ):
     accessible = _get_accessible_location_ids(db, current_user)
     if not accessible:
-        return FootfallListResponse(entries=[], total=0, page=page, page_size=page_size)
+        return FootfallListResponse.model_construct(entries=[], total=0, page=page, page_size=page_size)
 
     query = db.query(FootfallEntry).filter(
         FootfallEntry.organization_id == current_user.organization_id,
@@ -111,34 +146,36 @@ async def list_footfall_entries(
     )
 
     if location_id:
-        loc_uuid = uuid_lib.UUID(location_id)
-        if loc_uuid not in accessible:
+        if location_id not in accessible:
             raise HTTPException(status_code=403, detail="No access to this location")
-        query = query.filter(FootfallEntry.location_id == loc_uuid)
+        query = query.filter(FootfallEntry.location_id == location_id)
 
     if start_date:
         query = query.filter(FootfallEntry.date >= start_date)
     if end_date:
         query = query.filter(FootfallEntry.date <= end_date)
 
-    total = query.count()
-    entries = query.order_by(desc(FootfallEntry.date), FootfallEntry.location_id).offset(
+    # Join in the location and creator names so the page is enriched in the
+    # same query, and return the total alongside it via count() OVER ().
+    # Ordering both keys DESC lets idx_footfall_org_date_loc serve it backwards.
+    rows = query.outerjoin(
+        Location, Location.id == FootfallEntry.location_id
+    ).outerjoin(
+        User, User.id == FootfallEntry.created_by
+    ).add_columns(
+        Location.name, User.full_name, func.count().over()
+    ).order_by(desc(FootfallEntry.date), desc(FootfallEntry.location_id)).offset(
         (page - 1) * page_size
     ).limit(page_size).all()
 
-    # Enrich with names
-    loc_ids = {e.location_id for e in entries}
-    locs = {}
-    if loc_ids:
-        locs = {loc.id: loc.name for loc in db.query(Location).filter(Location.id.in_(loc_ids)).all()}
+    if rows:
+        total = rows[0][3]
+    else:
+        # An empty page past the end carries no window count
+        total = query.count() if page > 1 else 0
 
-    creator_ids = {e.created_by for e in entries}
-    creators = {}
-    if creator_ids:
-        creators = {u.id: u.full_name for u in db.query(User).filter(User.id.in_(creator_ids)).all()}
-
-    return FootfallListResponse(
-        entries=[_entry_to_response(e, locs.get(e.location_id), creators.get(e.created_by)) for e in entries],
+    return FootfallListResponse.model_construct(
+        entries=[_entry_to_response(e, location_name, creator_name) for e, location_name, creator_name, _ in rows],
         total=total,
         page=page,
         page_size=page_size,
@@ -146,7 +183,7 @@ async def list_footfall_entries(
 
 
 @router.post("/", response_model=FootfallResponse, status_code=status.HTTP_201_CREATED)
-async def create_footfall_entry(
+def create_footfall_entry(
     payload: FootfallCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -155,37 +192,33 @@ async def create_footfall_entry(
         raise HTTPException(status_code=403, detail="Missing feature:manage_footfall permission")
 
     accessible = _get_accessible_location_ids(db, current_user)
-    loc_uuid = uuid_lib.UUID(payload.location_id)
-    if loc_uuid not in accessible:
+    if payload.location_id not in accessible:
         raise HTTPException(status_code=403, detail="No access to this location")
 
-    existing = db.query(FootfallEntry).filter(
-        FootfallEntry.organization_id == current_user.organization_id,
-        FootfallEntry.location_id == loc_uuid,
-        FootfallEntry.date == payload.date,
+    # uq_org_location_date rejects duplicates; RETURNING is empty when it does
+    entry = db.execute(
+        pg_insert(FootfallEntry).values(
+            id=uuid_lib.uuid4(),
+            organization_id=current_user.organization_id,
+            location_id=payload.location_id,
+            date=payload.date,
+            count=payload.count,
+            created_by=current_user.id,
+        ).on_conflict_do_nothing(
+            index_elements=["organization_id", "location_id", "date"]
+        ).returning(*_ENTRY_COLUMNS)
     ).first()
-    if existing:
+    if entry is None:
         raise HTTPException(status_code=409, detail="Footfall entry already exists for this location and date")
-
-    entry = FootfallEntry(
-        id=uuid_lib.uuid4(),
-        organization_id=current_user.organization_id,
-        location_id=loc_uuid,
-        date=payload.date,
-        count=payload.count,
-        created_by=current_user.id,
-    )
-    db.add(entry)
     db.commit()
-    db.refresh(entry)
 
-    loc = db.query(Location).filter(Location.id == entry.location_id).first()
-    return _entry_to_response(entry, loc.name if loc else None, current_user.full_name)
+    location = get_org_locations(db, current_user.organization_id)[0].get(entry.location_id)
+    return _entry_to_response(entry, location.name if location else None, current_user.full_name)
 
 
 @router.put("/{entry_id}", response_model=FootfallResponse)
-async def update_footfall_entry(
-    entry_id: str,
+def update_footfall_entry(
+    entry_id: uuid_lib.UUID,
     payload: FootfallUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -193,47 +226,67 @@ async def update_footfall_entry(
     if not _has_manage_permission(db, current_user):
         raise HTTPException(status_code=403, detail="Missing feature:manage_footfall permission")
 
-    entry = db.query(FootfallEntry).filter(FootfallEntry.id == uuid_lib.UUID(entry_id)).first()
-    if not entry:
+    # Authorise against the entry and pick up its names in one query
+    current = db.query(FootfallEntry.created_by, Location.name, User.full_name).outerjoin(
+        Location, Location.id == FootfallEntry.location_id
+    ).outerjoin(
+        User, User.id == FootfallEntry.created_by
+    ).filter(
+        FootfallEntry.id == entry_id,
+        FootfallEntry.organization_id == current_user.organization_id,
+    ).first()
+    if not current:
         raise HTTPException(status_code=404, detail="Entry not found")
 
     is_admin = current_user.role in ADMIN_ROLES
-    if entry.created_by != current_user.id and not is_admin:
+    if current.created_by != current_user.id and not is_admin:
         raise HTTPException(status_code=403, detail="Only the creator or an admin can edit this entry")
 
-    entry.count = payload.count
-    entry.updated_by = current_user.id
+    entry = db.execute(
+        update(FootfallEntry).where(
+            FootfallEntry.id == entry_id
+        ).values(
+            count=payload.count,
+            updated_by=current_user.id,
+        ).returning(*_ENTRY_COLUMNS)
+    ).one()
     db.commit()
-    db.refresh(entry)
 
-    loc = db.query(Location).filter(Location.id == entry.location_id).first()
-    creator = db.query(User).filter(User.id == entry.created_by).first()
-    return _entry_to_response(entry, loc.name if loc else None, creator.full_name if creator else None)
+    return _entry_to_response(entry, current.name, current.full_name)
 
 
 @router.delete("/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_footfall_entry(
-    entry_id: str,
+def delete_footfall_entry(
+    entry_id: uuid_lib.UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     if not _has_manage_permission(db, current_user):
         raise HTTPException(status_code=403, detail="Missing feature:manage_footfall permission")
 
-    entry = db.query(FootfallEntry).filter(FootfallEntry.id == uuid_lib.UUID(entry_id)).first()
-    if not entry:
-        raise HTTPException(status_code=404, detail="Entry not found")
+    in_org = and_(
+        FootfallEntry.id == entry_id,
+        FootfallEntry.organization_id == current_user.organization_id,
+    )
 
-    is_admin = current_user.role in ADMIN_ROLES
-    if entry.created_by != current_user.id and not is_admin:
-        raise HTTPException(status_code=403, detail="Only the creator or an admin can delete this entry")
+    # Fuse the ownership check into the DELETE; only a miss needs a second look
+    stmt = delete(FootfallEntry).where(in_org)
+    if current_user.role not in ADMIN_ROLES:
+        stmt = stmt.where(FootfallEntry.created_by == current_user.id)
+    deleted = db.execute(stmt.returning(FootfallEntry.id)).first()
+
+    if not deleted:
+        if db.query(exists().where(in_org)).scalar():
+            raise HTTPException(status_code=403, detail="Only the creator or an admin can delete this entry")
+        raise HTTPException(status_code=404, detail="Entry not found")
 
-    db.delete(entry)
     db.commit()
 
 
 @router.get("/coverage", response_model=Dict[str, Any])
-async def get_footfall_coverage(
+def get_footfall_coverage(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_permission("page:footfall")),
     start_date: Optional[date] = Query(None),
@@ -242,9 +295,9 @@ async def get_footfall_coverage(
     """
     Returns per-location coverage: days with sales but no footfall entry.
     Defaults to the last 30 days if no dates provided.
+    Cached for COVERAGE_TTL.
+    Answers 304 when If-None-Match still matches the footfall and sales in range.
     """
-    from app.models.daily_sales_summary import DailySalesSummary
-
     if not end_date:
         end_date = date.today() - timedelta(days=1)
     if not start_date:
@@ -254,56 +307,98 @@ async def get_footfall_coverage(
     if not accessible:
         return {"locations": [], "start_date": str(start_date), "end_date": str(end_date)}
 
-    # Days with sales per location (transaction_count > 0)
-    sales_days = db.query(
+    digest = hashlib.sha1("|".join([
+        str(current_user.organization_id), str(start_date), str(end_date),
+        *sorted(str(lid) for lid in accessible),
+    ]).encode()).hexdigest()
+
+    etag = etag_for(digest, *_coverage_fingerprint(
+        db, current_user.organization_id, accessible, start_date, end_date
+    ))
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    response.headers["ETag"] = etag
+
+    # Keyed by the ETag too, so a body cached before the data changed is
+    # never served under the new ETag
+    key = f"footfall_coverage:{digest}:{etag}"
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
+    result = _footfall_coverage(db, current_user.organization_id, accessible, start_date, end_date)
+    cache_set(key, result, COVERAGE_TTL)
+    return result
+
+
+def _coverage_fingerprint(db: Session, organization_id, accessible: frozenset, start_date: date, end_date: date) -> tuple:
+    """Row counts and latest updated_at of the footfall and sales rows coverage reads."""
+    from app.models.daily_sales_summary import DailySalesSummary
+
+    footfall = db.query(
+        func.count(), func.max(FootfallEntry.updated_at)
+    ).filter(
+        FootfallEntry.organization_id == organization_id,
+        FootfallEntry.location_id.in_(accessible),
+        FootfallEntry.date >= start_date,
+        FootfallEntry.date <= end_date,
+    ).one()
+    sales = db.query(
+        func.count(), func.max(DailySalesSummary.updated_at)
+    ).filter(
+        DailySalesSummary.location_id.in_(accessible),
+        DailySalesSummary.date >= start_date,
+        DailySalesSummary.date <= end_date,
+    ).one()
+    return (*footfall, *sales)
+
+
+def _footfall_coverage(db: Session, organization_id, accessible: frozenset, start_date: date, end_date: date) -> dict:
+    from app.models.daily_sales_summary import DailySalesSummary
+
+    # Per location: days with sales (transaction_count > 0), and the subset of
+    # those with no footfall entry, found by an anti-join in the same statement
+    has_footfall = exists().where(
+        FootfallEntry.organization_id == organization_id,
+        FootfallEntry.location_id == DailySalesSummary.location_id,
+        FootfallEntry.date == DailySalesSummary.date,
+    )
+    coverage_rows = db.query(
         DailySalesSummary.location_id,
-        DailySalesSummary.date,
+        func.count().label("sales_days"),
+        func.array_agg(aggregate_order_by(DailySalesSummary.date, DailySalesSummary.date))
+            .filter(~has_footfall).label("missing_days"),
     ).filter(
         DailySalesSummary.location_id.in_(accessible),
         DailySalesSummary.date >= start_date,
         DailySalesSummary.date <= end_date,
         DailySalesSummary.transaction_count > 0,
-    ).all()
+    ).group_by(DailySalesSummary.location_id).all()
 
-    # Days with footfall entries per location
-    footfall_days = db.query(
-        FootfallEntry.location_id,
-        FootfallEntry.date,
-    ).filter(
-        FootfallEntry.organization_id == current_user.organization_id,
-        FootfallEntry.location_id.in_(accessible),
-        FootfallEntry.date >= start_date,
-        FootfallEntry.date <= end_date,
-    ).all()
-
-    footfall_set = {(str(r.location_id), r.date) for r in footfall_days}
-
-    # Group missing days by location
-    missing_by_loc: Dict[str, list] = {}
-    sales_by_loc: Dict[str, int] = {}
-    for row in sales_days:
-        loc_id = str(row.location_id)
-        sales_by_loc[loc_id] = sales_by_loc.get(loc_id, 0) + 1
-        if (loc_id, row.date) not in footfall_set:
-            missing_by_loc.setdefault(loc_id, []).append(str(row.date))
-
-    # Get location names
-    loc_ids_needed = set(sales_by_loc.keys())
-    loc_names = {}
-    if loc_ids_needed:
-        locs = db.query(Location).filter(Location.id.in_([uuid_lib.UUID(lid) for lid in loc_ids_needed])).all()
-        loc_names = {str(loc.id): loc.name for loc in locs}
-
-    results = []
-    for loc_id in sorted(loc_ids_needed, key=lambda x: loc_names.get(x, "")):
-        missing = sorted(missing_by_loc.get(loc_id, []))
-        results.append({
-            "location_id": loc_id,
-            "location_name": loc_names.get(loc_id, "Unknown"),
-            "sales_days": sales_by_loc.get(loc_id, 0),
-            "footfall_days": sales_by_loc.get(loc_id, 0) - len(missing),
-            "missing_days": missing,
-        })
+    # Location names for the locations with sales, keyed by UUID like coverage_rows
+    loc_names = dict(
+        db.query(Location.id, Location.name).filter(
+            Location.id.in_([row.location_id for row in coverage_rows])
+        ).all()
+    ) if coverage_rows else {}
+
+    # One pass over (location_id, sales_days, missing_days) tuples, each
+    # location's name looked up once
+    named_rows = sorted(
+        (loc_names.get(location_id, "Unknown"), location_id, sales_days, missing_days or ())
+        for location_id, sales_days, missing_days in coverage_rows
+    )
+    results = [
+        {
+            "location_id": str(location_id),
+            "location_name": name,
+            "sales_days": sales_days,
+            "footfall_days": sales_days - len(missing_days),
+            "missing_days": [d.isoformat() for d in missing_days],
+        }
+        for name, location_id, sales_days, missing_days in named_rows
+    ]
 
     return {
         "locations": results,
@@ -2,7 +2,7 @@
 Location Groups API — CRUD for grouping locations for aggregated analytics.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 import uuid as uuid_lib
 
@@ -25,9 +25,7 @@ router = APIRouter(prefix="/location-groups", tags=["location-groups"])
 
 def _get_user_accessible_location_ids(db: Session, user) -> set:
     """Get location IDs accessible to this user based on role/client assignment."""
-    from app.models.user import UserRole
-
-    role_val = user.role.value if isinstance(user.role, UserRole) else user.role
+    role_val = user.role_value
 
     # Admin/superadmin: all org locations
     if role_val in ("admin", "superadmin"):
@@ -64,58 +62,46 @@ def _get_user_accessible_location_ids(db: Session, user) -> set:
     return set()
 
 
-def _build_group_response(db: Session, group: LocationGroup, accessible_ids: set = None) -> LocationGroupResponse:
-    """Build a LocationGroupResponse, optionally filtering to accessible locations."""
-    member_rows = db.query(
-        location_group_members.c.location_id
-    ).filter(
-        location_group_members.c.location_group_id == group.id
-    ).all()
-    all_location_ids = [str(r[0]) for r in member_rows]
-
-    # Filter to accessible locations if provided
-    if accessible_ids is not None:
-        location_ids = [lid for lid in all_location_ids if lid in accessible_ids]
-    else:
-        location_ids = all_location_ids
-
-    # Resolve location names
-    location_names = []
-    if location_ids:
-        name_rows = db.query(Location.id, Location.name).filter(
-            Location.id.in_(location_ids)
-        ).all()
-        name_map = {str(r[0]): r[1] for r in name_rows}
-        location_names = [name_map.get(lid, "Unknown") for lid in location_ids]
-
+def _build_group_response(group: LocationGroup, accessible_ids: set = None) -> LocationGroupResponse:
+    """
+    Build a LocationGroupResponse from group.locations (selectin-loaded on list
+    requests), optionally filtering to accessible locations.
+    """
+    members = [
+        (str(loc.id), loc.name) for loc in group.locations
+        if accessible_ids is None or str(loc.id) in accessible_ids
+    ]
     return LocationGroupResponse(
         id=str(group.id),
         name=group.name,
         is_active=group.is_active,
-        location_ids=location_ids,
-        location_names=location_names,
+        location_ids=[lid for lid, _ in members],
+        location_names=[name for _, name in members],
         created_at=group.created_at,
         updated_at=group.updated_at,
     )
 
 
 @router.get("", response_model=LocationGroupList)
-async def list_location_groups(
+def list_location_groups(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """List location groups. Non-admin users only see groups with locations they can access."""
     accessible_ids = _get_user_accessible_location_ids(db, current_user)
 
-    groups = db.query(LocationGroup).filter(
+    # Members of every listed group arrive in one extra IN query
+    groups = db.query(LocationGroup).options(
+        selectinload(LocationGroup.locations).load_only(Location.id, Location.name)
+    ).filter(
         LocationGroup.organization_id == current_user.organization_id,
         LocationGroup.is_active == True,  # noqa: E712
     ).order_by(LocationGroup.name).all()
 
+    # Only include groups that have at least one accessible location
     result = []
     for group in groups:
-        resp = _build_group_response(db, group, accessible_ids)
-        # Only include groups that have at least one accessible location
+        resp = _build_group_response(group, accessible_ids)
         if resp.location_ids:
             result.append(resp)
 
@@ -123,7 +109,7 @@ async def list_location_groups(
 
 
 @router.post("", response_model=LocationGroupResponse, status_code=status.HTTP_201_CREATED)
-async def create_location_group(
+def create_location_group(
     data: LocationGroupCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin", "superadmin"])),
@@ -145,11 +131,11 @@ async def create_location_group(
 
     db.commit()
     db.refresh(group)
-    return _build_group_response(db, group)
+    return _build_group_response(group)
 
 
 @router.patch("/{group_id}", response_model=LocationGroupResponse)
-async def update_location_group(
+def update_location_group(
     group_id: str,
     data: LocationGroupUpdate,
     db: Session = Depends(get_db),
@@ -183,11 +169,11 @@ async def update_location_group(
 
     db.commit()
     db.refresh(group)
-    return _build_group_response(db, group)
+    return _build_group_response(group)
 
 
 @router.delete("/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_location_group(
+def delete_location_group(
     group_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin", "superadmin"])),
@@ -6,12 +6,17 @@ from datetime import datetime
 from typing import Dict
 
 from fastapi import APIRouter, Depends
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies import get_current_user, get_current_admin_user
 from app.models.user import User
 from app.models.role_permission import RolePermission
+from app.services.permission_cache import (
+    get_org_permission_matrix, get_role_permissions, invalidate_role_permissions,
+    load_org_permission_matrix, org_is_seeded,
+)
 from app.config.permissions import (
     ALL_PERMISSIONS, CONFIGURABLE_ROLES, FULL_ACCESS_ROLES, DEFAULT_PERMISSIONS,
 )
@@ -23,32 +28,35 @@ router = APIRouter()
 
 
 def _seed_defaults(db: Session, organization_id, updated_by=None):
-    """Insert default permission rows for an organization."""
-    for role in CONFIGURABLE_ROLES:
-        granted_keys = DEFAULT_PERMISSIONS.get(role, set())
-        for key in ALL_PERMISSIONS:
-            db.add(RolePermission(
-                id=uuid_lib.uuid4(),
-                organization_id=organization_id,
-                role=role,
-                permission_key=key,
-                granted=(key in granted_keys),
-                updated_at=datetime.utcnow(),
-                updated_by=updated_by,
-            ))
+    """Insert default permission rows for an organization in one executemany INSERT."""
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid_lib.uuid4(),
+            "organization_id": organization_id,
+            "role": role,
+            "permission_key": key,
+            "granted": key in DEFAULT_PERMISSIONS.get(role, set()),
+            "updated_at": now,
+            "updated_by": updated_by,
+        }
+        for role in CONFIGURABLE_ROLES
+        for key in ALL_PERMISSIONS
+    ]
+    # Two admins opening the matrix at once both try to seed; the loser's rows are dropped
+    db.execute(
+        pg_insert(RolePermission).on_conflict_do_nothing(
+            index_elements=["organization_id", "role", "permission_key"]
+        ),
+        rows,
+    )
     db.commit()
+    invalidate_role_permissions(organization_id)
 
 
 def _get_matrix(db: Session, organization_id) -> Dict[str, Dict[str, bool]]:
-    """Return {role: {permission_key: granted}} for an org."""
-    rows = db.query(RolePermission).filter(
-        RolePermission.organization_id == organization_id,
-    ).all()
-    matrix: Dict[str, Dict[str, bool]] = {role: {} for role in CONFIGURABLE_ROLES}
-    for row in rows:
-        if row.role in matrix and row.permission_key in ALL_PERMISSIONS:
-            matrix[row.role][row.permission_key] = row.granted
-    return matrix
+    """Return {role: {permission_key: granted}} for an org (cached, see permission_cache)."""
+    return get_org_permission_matrix(db, organization_id)
 
 
 @router.get("/matrix", response_model=PermissionMatrixResponse)
@@ -60,14 +68,11 @@ async def get_permission_matrix(
     Auto-seeds defaults if the organization has no permission rows yet."""
     org_id = current_user.organization_id
 
-    count = db.query(RolePermission).filter(
-        RolePermission.organization_id == org_id,
-    ).count()
-
-    if count == 0:
-        _seed_defaults(db, org_id, updated_by=current_user.id)
-
+    # An unseeded org reads back an empty matrix, so no separate count is needed
     matrix = _get_matrix(db, org_id)
+    if not any(matrix.values()):
+        _seed_defaults(db, org_id, updated_by=current_user.id)
+        matrix = _get_matrix(db, org_id)
 
     permissions = [
         PermissionKeyInfo(key=key, label=info["label"], category=info["category"])
@@ -86,36 +91,45 @@ async def update_permission_matrix(
     """Save the updated permission matrix. Upserts all rows."""
     org_id = current_user.organization_id
 
-    for role, perms in data.matrix.items():
-        if role not in CONFIGURABLE_ROLES:
-            continue
-        for key, granted in perms.items():
-            if key not in ALL_PERMISSIONS:
-                continue
-            existing = db.query(RolePermission).filter(
-                RolePermission.organization_id == org_id,
-                RolePermission.role == role,
-                RolePermission.permission_key == key,
-            ).first()
-
-            if existing:
-                existing.granted = granted
-                existing.updated_at = datetime.utcnow()
-                existing.updated_by = current_user.id
-            else:
-                db.add(RolePermission(
-                    id=uuid_lib.uuid4(),
-                    organization_id=org_id,
-                    role=role,
-                    permission_key=key,
-                    granted=granted,
-                    updated_at=datetime.utcnow(),
-                    updated_by=current_user.id,
-                ))
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid_lib.uuid4(),
+            "organization_id": org_id,
+            "role": role,
+            "permission_key": key,
+            "granted": granted,
+            "updated_at": now,
+            "updated_by": current_user.id,
+        }
+        for role, perms in data.matrix.items() if role in CONFIGURABLE_ROLES
+        for key, granted in perms.items() if key in ALL_PERMISSIONS
+    ]
+
+    if rows:
+        # One upsert on uq_org_role_permission instead of a SELECT and write per cell
+        stmt = pg_insert(RolePermission).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["organization_id", "role", "permission_key"],
+            set_={
+                "granted": stmt.excluded.granted,
+                "updated_at": stmt.excluded.updated_at,
+                "updated_by": stmt.excluded.updated_by,
+            },
+        ))
 
     db.commit()
+    invalidate_role_permissions(org_id)
+
+    if len(rows) == len(CONFIGURABLE_ROLES) * len(ALL_PERMISSIONS):
+        # The client sent every cell, so what it sent is what is stored
+        matrix = {role: {} for role in CONFIGURABLE_ROLES}
+        for row in rows:
+            matrix[row["role"]][row["permission_key"]] = row["granted"]
+    else:
+        # Cells it left out are read back from the database, never the Redis copy
+        matrix = load_org_permission_matrix(db, org_id)
 
-    matrix = _get_matrix(db, org_id)
     permissions = [
         PermissionKeyInfo(key=key, label=info["label"], category=info["category"])
         for key, info in ALL_PERMISSIONS.items()
@@ -130,7 +144,7 @@ async def get_my_permissions(
 ):
     """Return the flat list of granted permission keys for the current user.
     Admin/superadmin always get ALL keys."""
-    role_val = current_user.role.value if hasattr(current_user.role, "value") else str(current_user.role)
+    role_val = current_user.role_value
 
     if role_val in FULL_ACCESS_ROLES:
         return MyPermissionsResponse(permissions=list(ALL_PERMISSIONS.keys()))
@@ -138,20 +152,10 @@ async def get_my_permissions(
     org_id = current_user.organization_id
 
     # Check if org has been seeded
-    count = db.query(RolePermission).filter(
-        RolePermission.organization_id == org_id,
-    ).count()
-
-    if count == 0:
+    if not org_is_seeded(db, org_id):
         # Fall back to defaults without seeding (non-admin can't seed)
         defaults = DEFAULT_PERMISSIONS.get(role_val, set())
         return MyPermissionsResponse(permissions=list(defaults))
 
-    rows = db.query(RolePermission).filter(
-        RolePermission.organization_id == org_id,
-        RolePermission.role == role_val,
-        RolePermission.granted == True,  # noqa: E712
-    ).all()
-
-    granted = [row.permission_key for row in rows if row.permission_key in ALL_PERMISSIONS]
-    return MyPermissionsResponse(permissions=granted)
+    granted = get_role_permissions(db, org_id, role_val)
+    return MyPermissionsResponse(permissions=[key for key in granted if key in ALL_PERMISSIONS])
@@ -4,8 +4,10 @@ Sales API Endpoints
 from typing import Optional, List, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc, and_, or_, cast, Integer, text, select
+from sqlalchemy import func, desc, asc, and_, any_, cast, literal, Integer, String, text, select
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from datetime import datetime, timedelta, timezone, date as date_type, time as time_type
+import json
 import math
 
 
@@ -63,7 +65,7 @@ def calculate_date_range_from_preset(
 
 from app.database import get_db
 from app.dependencies import get_current_user, require_permission
-from app.models.user import User, UserRole
+from app.models.user import User
 from app.models.sales_transaction import SalesTransaction
 from app.models.location import Location
 from app.utils.timezone_helpers import local_date_col, local_hour_col, local_transaction_dt, utc_to_local
@@ -96,7 +98,7 @@ def _effective_client_id(user: User, client_id: Optional[str], db: Session = Non
       specific client, validate it's in their allowed list; otherwise None.
     - Admin/superadmin: pass through the query param.
     """
-    role_val = user.role.value if isinstance(user.role, UserRole) else user.role
+    role_val = user.role_value
 
     # Client role: always locked
     if role_val == "client" and user.client_id:
@@ -127,7 +129,7 @@ def _effective_client_id(user: User, client_id: Optional[str], db: Session = Non
 
 def _get_allowed_client_ids(user: User, db: Session) -> Optional[List[str]]:
     """Return list of client IDs the user is allowed to access, or None for unrestricted."""
-    role_val = user.role.value if isinstance(user.role, UserRole) else user.role
+    role_val = user.role_value
 
     if role_val == "client" and user.client_id:
         return [str(user.client_id)]
@@ -175,7 +177,7 @@ def get_accessible_locations(db: Session, user: User) -> List[str]:
     All other non-superadmin roles get all org locations — client filtering is
     handled separately via _get_client_filter_context.
     """
-    role_val = user.role.value if isinstance(user.role, UserRole) else user.role
+    role_val = user.role_value
 
     # Location-based roles: only their directly assigned locations
     if role_val in LOCATION_BASED_ROLES:
@@ -341,6 +343,18 @@ def _base_sales_filter(
     return and_(*conditions)
 
 
+def _has_jsonb_entries(key: str):
+    """raw_data-><key> is a non-empty array.
+
+    Keep this exact expression: it is the predicate of the partial indexes
+    idx_sales_with_returns / idx_sales_with_refunds, and the planner only
+    uses them when the query repeats it.
+    """
+    return func.jsonb_array_length(
+        func.coalesce(SalesTransaction.raw_data[key], text("'[]'::jsonb"))
+    ) > 0
+
+
 def _local_date_conditions(start, end):
     """Build local-date filter conditions (no location_id or status filter).
     Use with *_local_date_conditions(start, end) inside .filter() calls."""
@@ -358,11 +372,18 @@ def _local_date_conditions(start, end):
     ]
 
 
-def _txn_matches_category(line_items_json, cat_ids: set) -> bool:
-    """Return True if any line item's catalog_object_id is in cat_ids."""
-    if not line_items_json:
-        return False
-    return any(item.get("catalog_object_id", "") in cat_ids for item in line_items_json)
+def _category_filter(cat_ids: set):
+    """SQL filter: any line item's catalog_object_id is in cat_ids.
+
+    Expressed as JSONB containment (@>) so it can use the
+    idx_sales_line_items_gin jsonb_path_ops index; ->/->> lookups can't.
+    A category tree can hold thousands of ids, so they go in as one
+    jsonb[] parameter (line_items @> ANY(...)) rather than an OR per id.
+    """
+    patterns = [json.dumps([{"catalog_object_id": cid}]) for cid in sorted(cat_ids)]
+    return SalesTransaction.line_items.op("@>")(
+        any_(cast(literal(patterns, ARRAY(String)), ARRAY(JSONB)))
+    )
 
 
 # ─────────────────────────────────────────────────
@@ -479,25 +500,16 @@ async def list_transactions(
     query = query.order_by(desc(sort_column) if sort_order == "desc" else asc(sort_column))
 
     if cat_ids is not None:
-        # Category mode: must post-filter by line items matching catalog IDs
+        # Category mode: only transactions with a line item in the category
         if not cat_ids:
             return SalesTransactionList(transactions=[], total=0, page=page, page_size=page_size, total_pages=0)
-        all_matching = []
-        for txn in query.yield_per(500):
-            if _txn_matches_category(txn.line_items, cat_ids):
-                all_matching.append(txn)
-        total = len(all_matching)
-        total_pages = math.ceil(total / page_size)
-        offset = (page - 1) * page_size
-        page_txns = all_matching[offset:offset + page_size]
-        transactions_data = [_build_txn_data(txn) for txn in page_txns]
-    else:
-        # Location mode: standard SQL pagination
-        total = query.count()
-        offset = (page - 1) * page_size
-        transactions = query.offset(offset).limit(page_size).all()
-        total_pages = math.ceil(total / page_size)
-        transactions_data = [_build_txn_data(txn) for txn in transactions]
+        query = query.filter(_category_filter(cat_ids))
+
+    total = query.count()
+    offset = (page - 1) * page_size
+    transactions = query.offset(offset).limit(page_size).all()
+    total_pages = math.ceil(total / page_size)
+    transactions_data = [_build_txn_data(txn) for txn in transactions]
 
     return SalesTransactionList(
         transactions=[SalesTransactionResponse(**txn_data) for txn_data in transactions_data],
@@ -602,9 +614,7 @@ async def get_sales_aggregation(
         raw_rows = []
         for (line_items_json, gross, net, cur) in db.query(
             SalesTransaction.line_items, SalesTransaction.total_money_amount, SalesTransaction.amount_money_amount, SalesTransaction.amount_money_currency
-        ).filter(base).yield_per(500):
-            if not _txn_matches_category(line_items_json, cat_ids):
-                continue
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             raw_rows.append((int(gross or 0), int(net or 0), cur or "GBP"))
             all_cur.add(cur or "GBP")
         rates, _ = _fx.get_rates_to_gbp(db, current_user.organization_id, all_cur or {"GBP"})
@@ -742,9 +752,7 @@ async def get_sales_summary(
             SalesTransaction.amount_money_currency, SalesTransaction.tender_type,
             SalesTransaction.payment_status, SalesTransaction.transaction_date,
             SalesTransaction.location_id,
-        ).filter(base).yield_per(500):
-            if not _txn_matches_category(line_items_json, cat_ids):
-                continue
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             all_cur.add(cur or "GBP")
             raw_cat_rows.append((int(amount or 0), cur or "GBP", tender, status, txn_date, loc_id))
 
@@ -921,7 +929,7 @@ async def get_sales_by_location(
             SalesTransaction.location_id,
             SalesTransaction.line_items,
             SalesTransaction.amount_money_currency,
-        ).filter(base).yield_per(500):
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             if not line_items_json:
                 continue
 
@@ -1358,9 +1366,7 @@ async def get_basket_analytics(
         raw_rows = []
         for (line_items_json, total_amount, cur) in db.query(
             SalesTransaction.line_items, SalesTransaction.total_money_amount, SalesTransaction.total_money_currency,
-        ).filter(base).yield_per(500):
-            if not _txn_matches_category(line_items_json, cat_ids):
-                continue
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             all_cur.add(cur or "GBP")
             raw_rows.append((line_items_json, int(total_amount or 0), cur or "GBP"))
 
@@ -1478,9 +1484,7 @@ async def get_hourly_sales(
             SalesTransaction.transaction_date, SalesTransaction.line_items,
             SalesTransaction.amount_money_amount, SalesTransaction.amount_money_currency,
             SalesTransaction.location_id,
-        ).filter(base).yield_per(500):
-            if not _txn_matches_category(line_items_json, cat_ids):
-                continue
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             cur = txn_cur or "GBP"
             all_cur_h.add(cur)
             matched.append((txn_date, int(total_amount or 0), cur, line_items_json, str(loc_id)))
@@ -1603,7 +1607,7 @@ async def get_refunds_analytics(
         all_cur: set = set()
         for (line_items_json, loc_id, cur) in db.query(
             SalesTransaction.line_items, SalesTransaction.location_id, SalesTransaction.amount_money_currency
-        ).filter(base).yield_per(500):
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             if not line_items_json:
                 continue
             has_match = any(
@@ -1627,7 +1631,7 @@ async def get_refunds_analytics(
             ).filter(
                 SalesTransaction.location_id.in_(list(matched_locs)),
                 *_local_date_conditions(start, end),
-                SalesTransaction.raw_data["returns"] != None,  # noqa: E711
+                _has_jsonb_entries("returns"),
             ).all()
             for (rcurrency, returns_json) in return_rows:
                 if not returns_json or not isinstance(returns_json, list):
@@ -1660,11 +1664,7 @@ async def get_refunds_analytics(
     # Location mode: use SQL aggregation with returns (merchandise returns) instead of refunds
     result = db.query(
         func.count(SalesTransaction.id).label("total_orders"),
-        func.count(SalesTransaction.id).filter(
-            func.jsonb_array_length(
-                func.coalesce(SalesTransaction.raw_data['returns'], text("'[]'::jsonb"))
-            ) > 0
-        ).label("return_count"),
+        func.count(SalesTransaction.id).filter(_has_jsonb_entries("returns")).label("return_count"),
     ).filter(base).first()
 
     total_orders = int(result.total_orders or 0)
@@ -1673,12 +1673,7 @@ async def get_refunds_analytics(
     total_refund_amount = 0
     refund_cur_bk: Dict[str, dict] = {}
     if return_count > 0:
-        return_filter = and_(
-            base,
-            func.jsonb_array_length(
-                func.coalesce(SalesTransaction.raw_data['returns'], text("'[]'::jsonb"))
-            ) > 0,
-        )
+        return_filter = and_(base, _has_jsonb_entries("returns"))
         # Get currencies for exchange rate conversion
         all_cur: set = set()
         return_rows = []
@@ -1771,7 +1766,7 @@ async def get_refunds_daily(
             SalesTransaction.line_items,
             SalesTransaction.amount_money_amount,
             SalesTransaction.location_id,
-        ).filter(base).yield_per(500):
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             if not line_items_json:
                 continue
             has_match = any(
@@ -1805,7 +1800,7 @@ async def get_refunds_daily(
             ).filter(
                 SalesTransaction.location_id.in_(list(matched_locs)),
                 *_local_date_conditions(start, end),
-                SalesTransaction.raw_data["returns"] != None,  # noqa: E711
+                _has_jsonb_entries("returns"),
             ).all():
                 if not returns_json or not isinstance(returns_json, list):
                     continue
@@ -1849,12 +1844,7 @@ async def get_refunds_daily(
         daily_map[dk]["total_orders"] += int(row.total_orders or 0)
         daily_map[dk]["total_sales"] += round(int(row.total_sales or 0) * rate)
 
-    refund_filter = and_(
-        base,
-        func.jsonb_array_length(
-            func.coalesce(SalesTransaction.raw_data['refunds'], text("'[]'::jsonb"))
-        ) > 0,
-    )
+    refund_filter = and_(base, _has_jsonb_entries("refunds"))
     _loc_tz = {str(r[0]): (r[1] or "UTC") for r in db.query(Location.id, Location.timezone).filter(Location.id.in_(filtered)).all()}
     for (txn_date, raw_data_json, cur, _lid) in db.query(
         SalesTransaction.transaction_date, SalesTransaction.raw_data, SalesTransaction.amount_money_currency, SalesTransaction.location_id
@@ -2016,9 +2006,7 @@ async def get_tax_summary(
             SalesTransaction.line_items, SalesTransaction.total_tax_amount,
             SalesTransaction.amount_money_amount, SalesTransaction.transaction_date,
             SalesTransaction.location_id, SalesTransaction.amount_money_currency,
-        ).filter(base).yield_per(500):
-            if not _txn_matches_category(line_items_json, cat_ids):
-                continue
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             c = cur or "GBP"
             all_cur_tax.add(c)
             matched.append((int(tax_amt or 0), int(sales_amt or 0), txn_date, str(loc_id), c))
@@ -2178,7 +2166,7 @@ async def get_discount_summary(
             SalesTransaction.amount_money_currency,
             SalesTransaction.location_id,
             SalesTransaction.raw_data,
-        ).filter(base).yield_per(500)
+        ).filter(base, _category_filter(cat_ids)).yield_per(500)
 
         # Build location name and timezone lookups
         _loc_rows = db.query(Location.id, Location.name, Location.timezone).filter(Location.id.in_(filtered)).all()
@@ -2189,9 +2177,6 @@ async def get_discount_summary(
         all_currencies: set = set()
         matched_txns = []
         for txn_date, disc_amt, sale_amt, curr, loc_id, raw_data_json in rows:
-            line_items = raw_data_json.get("line_items", []) if raw_data_json else []
-            if not _txn_matches_category(line_items, cat_ids):
-                continue
             cur = curr or "GBP"
             all_currencies.add(cur)
             matched_txns.append((txn_date, int(disc_amt or 0), int(sale_amt or 0), cur, str(loc_id), raw_data_json))
@@ -2436,18 +2421,14 @@ async def get_tips_summary(
         # First pass: collect matched transactions and currencies
         matched_tips = []
         all_cur_tips: set = set()
-        for txn_date, tip_amt, sale_amt, curr, tender, loc_id, raw_data_json in db.query(
+        for txn_date, tip_amt, sale_amt, curr, tender, loc_id in db.query(
             SalesTransaction.transaction_date,
             SalesTransaction.total_tip_amount,
             SalesTransaction.amount_money_amount,
             SalesTransaction.amount_money_currency,
             SalesTransaction.tender_type,
             SalesTransaction.location_id,
-            SalesTransaction.raw_data,
-        ).filter(base).yield_per(500):
-            line_items = raw_data_json.get("line_items", []) if raw_data_json else []
-            if not _txn_matches_category(line_items, cat_ids):
-                continue
+        ).filter(base, _category_filter(cat_ids)).yield_per(500):
             cur = curr or "GBP"
             all_cur_tips.add(cur)
             matched_tips.append((txn_date, int(tip_amt or 0), int(sale_amt or 0), cur, tender, str(loc_id)))
@@ -3061,7 +3042,7 @@ async def _fast_summary_category_mode(
         SalesTransaction.amount_money_amount,
         SalesTransaction.total_discount_amount,
         SalesTransaction.total_tax_amount,
-    ).filter(base).yield_per(500):
+    ).filter(base, _category_filter(cat_ids)).yield_per(500):
         if not line_items_json:
             continue
 
@@ -3174,7 +3155,7 @@ async def _fast_summary_category_mode(
         ).filter(
             SalesTransaction.location_id.in_(matched_location_ids),
             *_local_date_conditions(start, end),
-            SalesTransaction.raw_data["returns"] != None,  # noqa: E711
+            _has_jsonb_entries("returns"),
         ).all()
     for (rcurrency, returns_json) in return_rows:
         if not returns_json or not isinstance(returns_json, list):
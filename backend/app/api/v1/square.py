@@ -5,6 +5,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import text
 from datetime import datetime
 import secrets
 import json
@@ -18,8 +19,11 @@ from app.models.square_account import SquareAccount
 from app.models.location import Location
 from app.models.data_import import DataImport, ImportType, ImportStatus as ImportStatusEnum
 from app.models.catalog_category import CatalogItemCategory
-from app.models.catalog_hierarchy import CatalogCategory, CatalogItemCategoryMembership
+from app.models.catalog_hierarchy import CatalogCategory
 from app.services.square_service import square_service
+from app.services.location_cache import invalidate_org_locations
+from app.utils.cache import bump_org_cache_version
+from app.utils.bulk import copy_rows
 from app.schemas.square import (
     SquareOAuthURL,
     SquareOAuthCallback,
@@ -310,6 +314,8 @@ async def update_location(
     location.is_active = location_update.is_active
     db.commit()
     db.refresh(location)
+    invalidate_org_locations(current_user.organization_id)
+    bump_org_cache_version(current_user.organization_id)
 
     return LocationResponse.model_validate(location)
 
@@ -752,6 +758,7 @@ async def sync_catalog_categories(
     items_processed = 0
     variations_processed = 0
     memberships_created = 0
+    memberships: dict[tuple[str, str], str] = {}  # (catalog_object_id, category_id) → item_id
     cursor = None
     while True:
         resp = await square_service.search_catalog_items(
@@ -824,26 +831,34 @@ async def sync_catalog_categories(
                     ))
                 variations_processed += 1
 
-                # Upsert category memberships (additive — never delete old ones)
+                # Collect category memberships; written in bulk below
                 for cid in all_cat_ids:
-                    existing_membership = db.query(CatalogItemCategoryMembership).filter(
-                        CatalogItemCategoryMembership.square_account_id == account.id,
-                        CatalogItemCategoryMembership.catalog_object_id == var_id,
-                        CatalogItemCategoryMembership.category_id == cid,
-                    ).first()
-                    if not existing_membership:
-                        db.add(CatalogItemCategoryMembership(
-                            square_account_id=account.id,
-                            catalog_object_id=var_id,
-                            item_id=item_id,
-                            category_id=cid,
-                        ))
-                        memberships_created += 1
+                    memberships[(var_id, cid)] = item_id
 
         cursor = resp.get("cursor")
         if not cursor:
             break
 
+    # Upsert category memberships (additive — never delete old ones):
+    # COPY into a temp table, then one INSERT ... ON CONFLICT DO NOTHING
+    if memberships:
+        db.execute(text(
+            "CREATE TEMP TABLE membership_load "
+            "(catalog_object_id VARCHAR, item_id VARCHAR, category_id VARCHAR) ON COMMIT DROP"
+        ))
+        copy_rows(
+            db, "membership_load", ("catalog_object_id", "item_id", "category_id"),
+            ((var_id, item_id, cid) for (var_id, cid), item_id in memberships.items()),
+        )
+        result = db.execute(text("""
+            INSERT INTO catalog_item_category_memberships
+                (square_account_id, catalog_object_id, item_id, category_id)
+            SELECT :account_id, catalog_object_id, item_id, category_id
+            FROM membership_load
+            ON CONFLICT (square_account_id, catalog_object_id, category_id) DO NOTHING
+        """), {"account_id": account.id})
+        memberships_created = result.rowcount
+
     db.commit()
 
     # Recompute client→product mappings for all clients in this org with keywords
@@ -8,6 +8,8 @@ from app.database import get_db
 from app.dependencies import get_current_user, get_current_admin_user
 from app.models.user import User, UserRole, user_locations
 from app.models.client import Client, user_clients
+from app.api.v1.client_groups import invalidate_accessible_client_ids
+from app.utils.cache import bump_org_cache_version
 from app.models.location import Location
 from app.models.square_account import SquareAccount
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserListResponse
@@ -25,7 +27,7 @@ ADMIN_ROLES = {"admin", "superadmin"}
 
 def _build_user_response(user: User) -> UserResponse:
     """Build a UserResponse from a User model instance."""
-    role_val = user.role.value if isinstance(user.role, UserRole) else user.role
+    role_val = user.role_value
 
     # For multi-client roles, include assigned_clients list
     assigned_ids = None
@@ -67,7 +69,7 @@ async def get_current_user_profile(
     """Get the current user's profile."""
     if current_user.client_id and not current_user.client:
         db.refresh(current_user, ["client"])
-    role_val = current_user.role.value if isinstance(current_user.role, UserRole) else current_user.role
+    role_val = current_user.role_value
     if role_val in MULTI_CLIENT_ROLES:
         db.refresh(current_user, ["assigned_clients"])
     if role_val in LOCATION_BASED_ROLES:
@@ -81,7 +83,7 @@ async def get_my_locations(
     db: Session = Depends(get_db),
 ):
     """Get the current user's assigned locations (for location-based roles like store_manager)."""
-    role_val = current_user.role.value if isinstance(current_user.role, UserRole) else current_user.role
+    role_val = current_user.role_value
     if role_val not in LOCATION_BASED_ROLES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -194,7 +196,7 @@ async def create_new_user(
     elif data.role in MULTI_CLIENT_ROLES:
         # Accept client_ids list, or fall back to single client_id
         ids_to_assign = data.client_ids or ([data.client_id] if data.client_id else [])
-        for cid in ids_to_assign:
+        for cid in dict.fromkeys(ids_to_assign):
             c = db.query(Client).filter(
                 Client.id == cid,
                 Client.organization_id == current_user.organization_id,
@@ -216,7 +218,7 @@ async def create_new_user(
 
     if user.client_id:
         db.refresh(user, ["client"])
-    role_val = user.role.value if isinstance(user.role, UserRole) else user.role
+    role_val = user.role_value
     if role_val in MULTI_CLIENT_ROLES:
         db.refresh(user, ["assigned_clients"])
     if role_val in LOCATION_BASED_ROLES:
@@ -262,7 +264,7 @@ async def update_user(
             detail="Cannot change your own role to non-admin",
         )
 
-    new_role = data.role or (user.role.value if isinstance(user.role, UserRole) else user.role)
+    new_role = data.role or user.role_value
     if data.role and data.role not in VALID_ROLES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -333,7 +335,7 @@ async def update_user(
             # Replace all user_clients rows
             db.execute(user_clients.delete().where(user_clients.c.user_id == user.id))
             if data.client_ids:
-                for cid in data.client_ids:
+                for cid in dict.fromkeys(data.client_ids):
                     c = db.query(Client).filter(
                         Client.id == cid,
                         Client.organization_id == current_user.organization_id,
@@ -359,6 +361,8 @@ async def update_user(
             user.client_id = data.client_id
 
     db.commit()
+    invalidate_accessible_client_ids(user_id=user.id)
+    bump_org_cache_version(current_user.organization_id)
     db.refresh(user)
     if user.client_id:
         db.refresh(user, ["client"])
@@ -409,8 +413,11 @@ async def delete_user(
     db.query(Dashboard).filter(Dashboard.created_by == user.id).update({"created_by": current_user.id})
 
     # CASCADE handles user_clients and dashboard user_id
+    deleted_user_id = user.id
     db.delete(user)
     db.commit()
+    invalidate_accessible_client_ids(user_id=deleted_user_id)
+    bump_org_cache_version(current_user.organization_id)
 
     return {"message": f"User {email} permanently deleted"}
 
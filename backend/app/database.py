@@ -10,8 +10,8 @@ from app.config import settings
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     pool_recycle=300,
     pool_timeout=30,
     echo=settings.DEBUG,
@@ -34,3 +34,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def warm_pool(size: int = settings.DB_POOL_SIZE) -> None:
+    """Open size pooled connections up front so the first burst of requests doesn't pay for connects."""
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
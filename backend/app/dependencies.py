@@ -9,12 +9,12 @@ from typing import Optional, List, Callable
 from app.database import get_db
 from app.services.auth_service import decode_access_token
 from app.models.user import User
-from app.models.role_permission import RolePermission
+from app.services.permission_cache import get_role_permissions
 
 security = HTTPBearer()
 
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
@@ -94,7 +94,7 @@ def require_role(allowed_roles: List[str]) -> Callable:
         or
         current_user: User = Depends(require_role(["admin", "superadmin"]))
     """
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: User = Depends(get_current_user)) -> User:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -115,21 +115,16 @@ def require_permission(*keys: str) -> Callable:
         or
         @router.get("/", dependencies=[Depends(require_permission("page:sales"))])
     """
-    async def permission_checker(
+    def permission_checker(
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db),
     ) -> User:
         if current_user.role in ("admin", "superadmin"):
             return current_user
 
+        granted = get_role_permissions(db, current_user.organization_id, current_user.role_value)
         for key in keys:
-            perm = db.query(RolePermission).filter(
-                RolePermission.organization_id == current_user.organization_id,
-                RolePermission.role == current_user.role,
-                RolePermission.permission_key == key,
-                RolePermission.granted == True,
-            ).first()
-            if not perm:
+            if key not in granted:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Permission required: {key}",
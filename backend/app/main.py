@@ -4,6 +4,7 @@ Teliporter Reporting Platform - Main FastAPI Application
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -12,7 +13,8 @@ from slowapi.errors import RateLimitExceeded
 import logging
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, warm_pool
+from app.utils.responses import ORJSONResponse
 
 logger = logging.getLogger(__name__)
 from app.api.v1 import auth, users, organizations, square, locations, sales, dashboards, reports, permissions, budgets, clients, exchange_rates, location_groups, client_groups, footfall
@@ -26,6 +28,11 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting up Teliporter Reporting Platform...")
+    try:
+        await run_in_threadpool(warm_pool)
+    except Exception as e:
+        # Not fatal: connections are opened on demand if the database isn't up yet
+        logger.warning("Could not pre-warm the database pool: %s", e)
     yield
     # Shutdown
     logger.info("Shutting down...")
@@ -37,6 +44,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -23,7 +23,7 @@ class Budget(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     location_id = Column(UUID(as_uuid=True), ForeignKey("locations.id"), nullable=False)
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, nullable=False)
     budget_amount = Column(BigInteger, nullable=False)  # Stored in cents
     currency = Column(String, nullable=False)
     budget_type = Column(SQLEnum(BudgetType, values_callable=lambda obj: [e.value for e in obj]), nullable=False, default=BudgetType.DAILY)
@@ -37,7 +37,8 @@ class Budget(Base):
     creator = relationship("User", foreign_keys=[created_by])
 
     __table_args__ = (
-        Index('idx_budgets_location_date', 'location_id', 'date'),
+        Index('idx_budgets_location_date', 'location_id', 'date', 'id'),
+        Index('idx_budgets_date_loc', 'date', 'location_id'),
         # Unique constraint: one budget per location, date, and type
         Index('uq_location_date_type', 'location_id', 'date', 'budget_type', unique=True),
     )
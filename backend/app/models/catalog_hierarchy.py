@@ -1,11 +1,10 @@
 """
 Catalog Hierarchy Models - Stores full Square category tree and item-category memberships
 """
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
-import uuid
 
 from app.database import Base
 
@@ -14,7 +13,7 @@ class CatalogCategory(Base):
     """Stores each Square category with hierarchy info."""
     __tablename__ = "catalog_categories"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     square_account_id = Column(UUID(as_uuid=True), ForeignKey("square_accounts.id", ondelete="CASCADE"), nullable=False)
     square_category_id = Column(String, nullable=False)
     name = Column(String, nullable=False)
@@ -33,11 +32,18 @@ class CatalogItemCategoryMembership(Base):
     """Many-to-many: a catalog item/variation can belong to many categories."""
     __tablename__ = "catalog_item_category_memberships"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     square_account_id = Column(UUID(as_uuid=True), ForeignKey("square_accounts.id", ondelete="CASCADE"), nullable=False)
-    catalog_object_id = Column(String, nullable=False, index=True)
+    catalog_object_id = Column(String, primary_key=True)  # Partition key, part of the PK
     item_id = Column(String, nullable=False)
-    category_id = Column(String, nullable=False, index=True)
+    category_id = Column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('square_account_id', 'catalog_object_id', 'category_id', name='uq_item_cat_membership'),
+        Index('idx_cat_membership_obj', 'catalog_object_id'),
+        Index('idx_cat_membership_cat', 'category_id'),
+        {'postgresql_partition_by': 'HASH (catalog_object_id)'},
+    )
 
     square_account = relationship("SquareAccount")
 
@@ -49,7 +55,7 @@ class ClientCatalogMapping(Base):
     """Pre-computed mapping: client → catalog_object_ids that match their keywords."""
     __tablename__ = "client_catalog_mappings"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     client_id = Column(UUID(as_uuid=True), ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
     catalog_object_id = Column(String, nullable=False, index=True)
     matched_keyword = Column(String, nullable=True)
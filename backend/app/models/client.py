@@ -1,7 +1,7 @@
 """
 Client Model - for assigning to locations
 """
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Table
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index, Table, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -28,6 +28,10 @@ class Client(Base):
     users = relationship("User", back_populates="client")
     client_groups = relationship("ClientGroup", secondary="client_group_members", back_populates="clients")
 
+    __table_args__ = (
+        Index('ix_clients_org_active_name', 'organization_id', 'is_active', 'name'),
+    )
+
     def __repr__(self):
         return f"<Client {self.name}>"
 
@@ -39,7 +43,8 @@ client_locations = Table(
     Column('id', UUID(as_uuid=True), primary_key=True, default=uuid.uuid4),
     Column('client_id', UUID(as_uuid=True), ForeignKey('clients.id', ondelete='CASCADE'), nullable=False),
     Column('location_id', UUID(as_uuid=True), ForeignKey('locations.id', ondelete='CASCADE'), nullable=False),
-    Column('created_at', DateTime, default=datetime.utcnow, nullable=False)
+    Column('created_at', DateTime, default=datetime.utcnow, nullable=False),
+    Index('ix_client_locations_client_id', 'client_id', 'location_id'),
 )
 
 # Association table for many-to-many relationship between users and clients
@@ -49,5 +54,6 @@ user_clients = Table(
     Column('id', UUID(as_uuid=True), primary_key=True, default=uuid.uuid4),
     Column('user_id', UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
     Column('client_id', UUID(as_uuid=True), ForeignKey('clients.id', ondelete='CASCADE'), nullable=False),
-    Column('created_at', DateTime, default=datetime.utcnow, nullable=False)
+    Column('created_at', DateTime, default=datetime.utcnow, nullable=False),
+    UniqueConstraint('user_id', 'client_id', name='uq_user_clients_user_client'),
 )
@@ -1,7 +1,7 @@
 """
 Client Group Model — allows admins to group clients for aggregated analytics views.
 """
-from sqlalchemy import Column, String, Boolean, ForeignKey, Table, DateTime, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, ForeignKey, Table, DateTime, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -36,5 +36,9 @@ class ClientGroup(Base):
     organization = relationship("Organization", back_populates="client_groups")
     clients = relationship("Client", secondary="client_group_members", back_populates="client_groups")
 
+    __table_args__ = (
+        Index('ix_client_groups_org_active_name', 'organization_id', 'is_active', 'name'),
+    )
+
     def __repr__(self):
         return f"<ClientGroup {self.name}>"
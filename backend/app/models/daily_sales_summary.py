@@ -40,8 +40,12 @@ class DailySalesSummary(Base):
 
     __table_args__ = (
         UniqueConstraint('location_id', 'date', name='uq_daily_summary_location_date'),
-        Index('idx_daily_summary_date', 'date'),
-        Index('idx_daily_summary_loc_date', 'location_id', 'date'),
+        Index('idx_daily_summary_date', 'date', postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
+        # Covering index so summary aggregations are index-only scans
+        Index(
+            'idx_daily_summary_loc_date', 'location_id', 'date',
+            postgresql_include=['total_sales', 'total_gross', 'total_tax', 'total_refund_amount', 'transaction_count', 'currency'],
+        ),
     )
 
     def __repr__(self):
@@ -31,6 +31,7 @@ class FootfallEntry(Base):
 
     __table_args__ = (
         Index('idx_footfall_location_date', 'location_id', 'date'),
+        Index('idx_footfall_org_date_loc', 'organization_id', 'date', 'location_id'),
         Index('uq_org_location_date', 'organization_id', 'location_id', 'date', unique=True),
     )
 
@@ -1,7 +1,7 @@
 """Role Permission model — stores per-org, per-role permission grants."""
 import uuid as uuid_lib
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.database import Base
@@ -20,5 +20,4 @@ class RolePermission(Base):
 
     __table_args__ = (
         UniqueConstraint("organization_id", "role", "permission_key", name="uq_org_role_permission"),
-        Index("ix_role_permissions_org_role", "organization_id", "role"),
     )
@@ -1,7 +1,7 @@
 """
 Sales Transaction Model - Denormalized for performance
 """
-from sqlalchemy import Column, String, DateTime, BigInteger, ForeignKey, Index, Text
+from sqlalchemy import Column, String, DateTime, BigInteger, ForeignKey, Index, Text, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -15,10 +15,10 @@ class SalesTransaction(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     location_id = Column(UUID(as_uuid=True), ForeignKey("locations.id", ondelete="CASCADE"), nullable=False)
-    square_transaction_id = Column(String, unique=True, nullable=False)
+    square_transaction_id = Column(String, nullable=False)
 
-    # Transaction timing
-    transaction_date = Column(DateTime(timezone=True), nullable=False)
+    # Transaction timing (partition key, so part of the primary key)
+    transaction_date = Column(DateTime(timezone=True), primary_key=True, nullable=False)
 
     # Money amounts (stored in smallest currency unit - cents, pence, etc.)
     amount_money_amount = Column(BigInteger, nullable=False)  # Net amount
@@ -56,14 +56,39 @@ class SalesTransaction(Base):
     location = relationship("Location", back_populates="sales_transactions")
 
     # Indexes for performance
+    # The table is RANGE-partitioned by month of transaction_date (see
+    # migration 3d0cf7a196c5), so unique constraints include the date.
     __table_args__ = (
+        UniqueConstraint('square_transaction_id', 'transaction_date', name='uq_sales_square_id_date'),
         Index('idx_sales_location_date', 'location_id', 'transaction_date'),
-        Index('idx_sales_square_id', 'square_transaction_id'),
-        Index('idx_sales_date', 'transaction_date'),
-        Index('idx_sales_status', 'payment_status'),
+        Index('idx_sales_date', 'transaction_date', postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
+        # Reporting only aggregates COMPLETED sales
+        Index(
+            'idx_sales_status_completed', 'location_id', 'transaction_date',
+            postgresql_where=text("payment_status = 'COMPLETED'"),
+        ),
         Index('idx_sales_currency', 'amount_money_currency'),
-        # Composite index for filtered aggregation queries (location + status + date range)
-        Index('idx_sales_loc_status_date', 'location_id', 'payment_status', 'transaction_date'),
+        # Composite covering index for filtered aggregation queries (location + status + date range)
+        Index(
+            'idx_sales_loc_status_date', 'location_id', 'payment_status', 'transaction_date',
+            postgresql_include=[
+                'id', 'amount_money_amount', 'amount_money_currency', 'total_money_amount',
+                'total_discount_amount', 'total_tax_amount', 'total_tip_amount',
+            ],
+        ),
+        # Containment (@>) lookups on line items / categories
+        Index('idx_sales_line_items_gin', 'line_items', postgresql_using='gin', postgresql_ops={'line_items': 'jsonb_path_ops'}),
+        Index('idx_sales_product_categories_gin', 'product_categories', postgresql_using='gin', postgresql_ops={'product_categories': 'jsonb_path_ops'}),
+        # Partial indexes for the returns / refunds reports
+        Index(
+            'idx_sales_with_returns', 'location_id', 'transaction_date',
+            postgresql_where=text("jsonb_array_length(coalesce(raw_data->'returns', '[]'::jsonb)) > 0"),
+        ),
+        Index(
+            'idx_sales_with_refunds', 'location_id', 'transaction_date',
+            postgresql_where=text("jsonb_array_length(coalesce(raw_data->'refunds', '[]'::jsonb)) > 0"),
+        ),
+        {'postgresql_partition_by': 'RANGE (transaction_date)'},
     )
 
     def __repr__(self):
@@ -61,6 +61,11 @@ class User(Base):
     def __repr__(self):
         return f"<User {self.email} ({self.role})>"
 
+    @property
+    def role_value(self) -> str:
+        """Role as a plain string, whether loaded as a UserRole or assigned as a str"""
+        return self.role.value if isinstance(self.role, UserRole) else self.role
+
     def has_role(self, *roles: UserRole) -> bool:
         """Check if user has any of the specified roles"""
         return self.role in roles
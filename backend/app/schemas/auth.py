@@ -3,6 +3,7 @@ Authentication Schemas
 """
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
+from uuid import UUID
 
 
 class LoginRequest(BaseModel):
@@ -40,12 +41,12 @@ class RefreshTokenResponse(BaseModel):
 
 class UserResponse(BaseModel):
     """User response schema"""
-    id: str
+    id: UUID
     email: str
     full_name: str
     role: str
-    organization_id: str
-    client_id: Optional[str] = None
+    organization_id: UUID
+    client_id: Optional[UUID] = None
     client_ids: Optional[List[str]] = None
     location_ids: Optional[List[str]] = None
     is_active: bool
@@ -50,7 +50,8 @@ class BudgetResponse(BudgetBase):
 class BudgetListResponse(BaseModel):
     """Budget list response schema"""
     budgets: list[BudgetResponse]
-    total: int
+    total: Optional[int] = None  # Only computed for page-number requests
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page
 
 
 class BudgetPerformance(BaseModel):
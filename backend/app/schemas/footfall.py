@@ -4,10 +4,11 @@ Footfall Schemas
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import date, datetime
+from uuid import UUID
 
 
 class FootfallCreate(BaseModel):
-    location_id: str
+    location_id: UUID
     date: date
     count: int = Field(..., ge=0, description="Footfall visitor count")
 
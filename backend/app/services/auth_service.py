@@ -3,12 +3,15 @@ Authentication Service
 """
 from datetime import datetime
 from typing import Optional, Tuple
+from sqlalchemy import String, cast, func, select, update
 from sqlalchemy.orm import Session
 
-from app.models.user import User
+from app.models.user import User, user_locations
+from app.models.client import user_clients
 from app.utils.security import (
     hash_password,
-    verify_password,
+    verify_and_update_password,
+    dummy_verify_password,
     create_access_token,
     create_refresh_token,
     decode_token,
@@ -26,22 +29,51 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         password: Plain text password
 
     Returns:
-        User object if authentication successful, None otherwise
+        User object if authentication successful, None otherwise. The
+        user's client and location assignments are loaded in the same
+        query and exposed as assigned_client_ids / assigned_location_ids
+        (lists of id strings).
     """
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
+    client_ids = select(func.array_agg(cast(user_clients.c.client_id, String))).where(
+        user_clients.c.user_id == User.id
+    ).correlate(User).scalar_subquery()
+    location_ids = select(func.array_agg(cast(user_locations.c.location_id, String))).where(
+        user_locations.c.user_id == User.id
+    ).correlate(User).scalar_subquery()
+
+    row = db.query(User, client_ids, location_ids).filter(User.email == email).first()
+
+    if not row:
+        # Keep unknown emails as slow as wrong passwords
+        dummy_verify_password()
         return None
 
+    user = row[0]
+
     if not user.is_active:
+        dummy_verify_password()
         return None
 
-    if not verify_password(password, user.password_hash):
+    verified, new_hash = verify_and_update_password(password, user.password_hash)
+    if not verified:
         return None
 
-    # Update last login
-    user.last_login = datetime.utcnow()
+    user.assigned_client_ids = row[1] or []
+    user.assigned_location_ids = row[2] or []
+
+    # Update last login (and upgrade the hash if its scheme is deprecated).
+    # The user is detached first so the commit doesn't expire it and force a
+    # reload when the caller reads it back.
+    now = datetime.utcnow()
+    values = {"last_login": now}
+    if new_hash:
+        values["password_hash"] = new_hash
+    db.expunge(user)
+    db.execute(update(User).where(User.id == user.id).values(**values))
     db.commit()
+    user.last_login = now
+    if new_hash:
+        user.password_hash = new_hash
 
     return user
 
@@ -56,8 +88,9 @@ def create_user_tokens(user: User) -> Tuple[str, str]:
     Returns:
         Tuple of (access_token, refresh_token)
     """
+    user_id = str(user.id)
     token_data = {
-        "sub": str(user.id),
+        "sub": user_id,
         "email": user.email,
         "role": user.role.value,
         "org_id": str(user.organization_id),
@@ -65,7 +98,7 @@ def create_user_tokens(user: User) -> Tuple[str, str]:
     }
 
     access_token = create_access_token(token_data)
-    refresh_token = create_refresh_token({"sub": str(user.id)})
+    refresh_token = create_refresh_token({"sub": user_id})
 
     return access_token, refresh_token
 
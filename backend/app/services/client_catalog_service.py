@@ -5,15 +5,16 @@ based on client category_keywords matched against catalog categories.
 """
 import logging
 from typing import Optional, Set
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.models.client import Client
 from app.models.catalog_hierarchy import (
     CatalogCategory,
     CatalogItemCategoryMembership,
-    ClientCatalogMapping,
 )
 from app.models.square_account import SquareAccount
+from app.utils.bulk import copy_rows
 
 logger = logging.getLogger(__name__)
 
@@ -70,14 +71,13 @@ def recompute_client_mappings(
             children_map.setdefault(cat.parent_category_id, []).append(cat.square_category_id)
 
     total_mappings = 0
+    # (client_id, catalog_object_id, matched_keyword) for every client recomputed
+    staged: list[tuple] = []
 
     for client in clients:
         keywords = client.category_keywords or []
         if not keywords:
-            # Clear any existing mappings
-            db.query(ClientCatalogMapping).filter(
-                ClientCatalogMapping.client_id == client.id
-            ).delete()
+            # Nothing staged, so the merge below clears any existing mappings
             continue
 
         # Find all category IDs where the category name or any ancestor name matches a keyword
@@ -125,24 +125,39 @@ def recompute_client_mappings(
                 if obj_id not in matched_objects:
                     matched_objects[obj_id] = keyword_by_cat.get(cat_id, keywords[0])
 
-        # Clear old mappings for this client
-        db.query(ClientCatalogMapping).filter(
-            ClientCatalogMapping.client_id == client.id
-        ).delete()
-
-        # Insert new mappings
-        for obj_id, keyword in matched_objects.items():
-            db.add(ClientCatalogMapping(
-                client_id=client.id,
-                catalog_object_id=obj_id,
-                matched_keyword=keyword,
-            ))
-            total_mappings += 1
+        staged.extend((client.id, obj_id, keyword) for obj_id, keyword in matched_objects.items())
+        total_mappings += len(matched_objects)
 
         logger.info(
             f"Client '{client.name}' ({client.id}): {len(matched_objects)} products "
             f"matched from {len(matching_cat_ids)} categories using keywords {keywords}"
         )
 
+    # Mappings are derived data and mostly unchanged between syncs, so stage
+    # the new set in a temp table (never WAL-logged) and only write the
+    # difference, instead of deleting and re-inserting every row.
+    # created_at has no server default, so the INSERT sets it explicitly.
+    db.execute(text(
+        "CREATE TEMP TABLE mapping_stage "
+        "(client_id UUID, catalog_object_id VARCHAR, matched_keyword VARCHAR) ON COMMIT DROP"
+    ))
+    copy_rows(db, "mapping_stage", ("client_id", "catalog_object_id", "matched_keyword"), staged)
+    db.execute(text("""
+        DELETE FROM client_catalog_mappings m
+        WHERE m.client_id = ANY(CAST(:client_ids AS UUID[]))
+          AND NOT EXISTS (
+              SELECT 1 FROM mapping_stage s
+              WHERE s.client_id = m.client_id AND s.catalog_object_id = m.catalog_object_id
+          )
+    """), {"client_ids": [str(c.id) for c in clients]})
+    db.execute(text("""
+        INSERT INTO client_catalog_mappings (client_id, catalog_object_id, matched_keyword, created_at)
+        SELECT client_id, catalog_object_id, matched_keyword, now() AT TIME ZONE 'utc'
+        FROM mapping_stage
+        ON CONFLICT (client_id, catalog_object_id) DO UPDATE
+            SET matched_keyword = EXCLUDED.matched_keyword
+            WHERE client_catalog_mappings.matched_keyword IS DISTINCT FROM EXCLUDED.matched_keyword
+    """))
+
     db.commit()
     return total_mappings
@@ -0,0 +1,73 @@
+"""
+Organization location cache.
+Keeps each organization's locations in process memory for a short TTL so
+reference lookups (names, currencies) don't hit the database on every request.
+"""
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+import uuid as uuid_lib
+
+from sqlalchemy.orm import Session
+
+from app.models.location import Location
+from app.models.square_account import SquareAccount
+
+
+# Seconds an organization's locations are served from memory. Invalidation
+# only reaches the worker process that made the change, so this also bounds
+# how stale another worker can be.
+ORG_LOCATIONS_TTL = 60
+MAX_CACHED_ORGS = 512
+
+
+class CachedLocation(NamedTuple):
+    id: uuid_lib.UUID
+    name: str
+    currency: str
+    is_active: bool
+
+
+OrgLocations = Tuple[Dict[uuid_lib.UUID, CachedLocation], Dict[str, CachedLocation]]
+
+_cache: Dict[uuid_lib.UUID, Tuple[float, OrgLocations]] = {}
+_lock = threading.Lock()
+
+
+def get_org_locations(db: Session, organization_id: uuid_lib.UUID) -> OrgLocations:
+    """
+    Return ({location_id: location}, {lower-cased stripped name: location})
+    for every location (active or not) under the organization's Square accounts.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(organization_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    rows = db.query(Location.id, Location.name, Location.currency, Location.is_active).join(
+        SquareAccount, SquareAccount.id == Location.square_account_id
+    ).filter(
+        SquareAccount.organization_id == organization_id
+    ).all()
+
+    by_id = {}
+    by_name = {}
+    for row in rows:
+        loc = CachedLocation(row.id, row.name, row.currency, row.is_active)
+        by_id[loc.id] = loc
+        by_name[loc.name.strip().lower()] = loc
+    value = (by_id, by_name)
+
+    with _lock:
+        if len(_cache) >= MAX_CACHED_ORGS:
+            # Drop the oldest insertion to stay bounded
+            _cache.pop(next(iter(_cache)), None)
+        _cache[organization_id] = (now + ORG_LOCATIONS_TTL, value)
+    return value
+
+
+def invalidate_org_locations(organization_id: Optional[uuid_lib.UUID]) -> None:
+    """Forget the cached locations of an organization after they change."""
+    with _lock:
+        _cache.pop(organization_id, None)
@@ -0,0 +1,96 @@
+"""
+Role permission cache.
+Keeps the granted permission keys of each (organization, role), and each
+organization's full permission matrix, in Redis for a short TTL so permission
+checks don't query role_permissions on every request.
+"""
+from typing import Dict, FrozenSet, Set
+
+from sqlalchemy.orm import Session
+
+from app.config.permissions import ALL_PERMISSIONS, CONFIGURABLE_ROLES
+from app.models.role_permission import RolePermission
+from app.utils.cache import cache_delete, cache_get, cache_set
+
+
+# Seconds a role's granted permissions are served from Redis
+ROLE_PERMISSIONS_TTL = 30
+
+
+# Organizations known to have permission rows. Seeding only ever adds rows,
+# so a per-process set never goes stale and saves the "seeded yet?" query.
+_SEEDED_ORGS: Set[str] = set()
+
+
+def _key(organization_id, role: str) -> str:
+    return f"perms:{organization_id}:{role}"
+
+
+def _matrix_key(organization_id) -> str:
+    return f"perm_matrix:{organization_id}"
+
+
+def org_is_seeded(db: Session, organization_id) -> bool:
+    """Whether the organization has any role_permissions rows yet."""
+    if str(organization_id) in _SEEDED_ORGS:
+        return True
+    seeded = db.query(RolePermission.id).filter(
+        RolePermission.organization_id == organization_id,
+    ).first() is not None
+    if seeded:
+        _SEEDED_ORGS.add(str(organization_id))
+    return seeded
+
+
+def get_org_permission_matrix(db: Session, organization_id) -> Dict[str, Dict[str, bool]]:
+    """Return {role: {permission_key: granted}} for an organization."""
+    key = _matrix_key(organization_id)
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
+    matrix = load_org_permission_matrix(db, organization_id)
+    cache_set(key, matrix, ROLE_PERMISSIONS_TTL)
+    return matrix
+
+
+def load_org_permission_matrix(db: Session, organization_id) -> Dict[str, Dict[str, bool]]:
+    """Read {role: {permission_key: granted}} for an organization from the database, bypassing Redis."""
+    rows = db.query(
+        RolePermission.role, RolePermission.permission_key, RolePermission.granted,
+    ).filter(
+        RolePermission.organization_id == organization_id,
+    ).all()
+
+    matrix: Dict[str, Dict[str, bool]] = {role: {} for role in CONFIGURABLE_ROLES}
+    for role, permission_key, granted in rows:
+        if role in matrix and permission_key in ALL_PERMISSIONS:
+            matrix[role][permission_key] = granted
+    if rows:
+        _SEEDED_ORGS.add(str(organization_id))
+    return matrix
+
+
+def get_role_permissions(db: Session, organization_id, role: str) -> FrozenSet[str]:
+    """Return the permission keys granted to a role within an organization."""
+    key = _key(organization_id, role)
+    cached = cache_get(key)
+    if cached is not None:
+        return frozenset(cached)
+
+    rows = db.query(RolePermission.permission_key).filter(
+        RolePermission.organization_id == organization_id,
+        RolePermission.role == role,
+        RolePermission.granted == True,  # noqa: E712
+    ).all()
+    granted = frozenset(r[0] for r in rows)
+    cache_set(key, sorted(granted), ROLE_PERMISSIONS_TTL)
+    return granted
+
+
+def invalidate_role_permissions(organization_id) -> None:
+    """Forget the cached matrix and per-role permissions after the matrix changes."""
+    cache_delete(
+        _matrix_key(organization_id),
+        *(_key(organization_id, role) for role in CONFIGURABLE_ROLES),
+    )
@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.models.square_account import SquareAccount
 from app.models.location import Location
+from app.services.location_cache import invalidate_org_locations
+from app.utils.cache import bump_org_cache_version
 from app.utils.encryption import encrypt_token, decrypt_token
 
 
@@ -572,6 +574,8 @@ class SquareService:
             synced_locations.append(location)
 
         db.commit()
+        invalidate_org_locations(square_account.organization_id)
+        bump_org_cache_version(square_account.organization_id)
         return synced_locations
 
 
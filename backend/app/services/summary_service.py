@@ -2,9 +2,9 @@
 Daily Sales Summary rebuild service.
 Extracts the rebuild logic so it can be called from both the API endpoint and Celery tasks.
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, date, timedelta, time
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text
 import uuid as uuid_lib
@@ -12,13 +12,16 @@ import uuid as uuid_lib
 from app.models.sales_transaction import SalesTransaction
 from app.models.daily_sales_summary import DailySalesSummary
 from app.models.location import Location
-from app.utils.timezone_helpers import local_date_col, local_hour_col
+from app.utils.timezone_helpers import local_date_col, local_hour_col, local_transaction_dt
 
 
-def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str]) -> int:
+def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str], since: Optional[date] = None) -> int:
     """
     Rebuild daily_sales_summary rows for the given location IDs.
     Uses SQL aggregation for speed. Returns number of summaries created.
+
+    If since is given, only local dates on or after it are re-aggregated and
+    replaced; older summary rows are left as they are.
     """
     if not location_ids:
         return 0
@@ -26,6 +29,15 @@ def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str])
     tx_date_col = local_date_col()
     hour_col = local_hour_col()
 
+    scope = [SalesTransaction.location_id.in_(location_ids)]
+    if since is not None:
+        scope += [
+            # Coarse UTC bound (one day of slack for timezones) so the scan
+            # can use the transaction_date indexes / partition pruning
+            SalesTransaction.transaction_date >= datetime.combine(since - timedelta(days=1), time.min),
+            func.date(local_transaction_dt()) >= since,
+        ]
+
     # Step 1: Core metrics via SQL (timezone-aware via Location JOIN)
     core_rows = db.query(
         SalesTransaction.location_id,
@@ -40,7 +52,7 @@ def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str])
     ).join(
         Location, SalesTransaction.location_id == Location.id
     ).filter(
-        SalesTransaction.location_id.in_(location_ids),
+        *scope,
         SalesTransaction.payment_status == "COMPLETED",
     ).group_by(
         SalesTransaction.location_id, tx_date_col
@@ -74,7 +86,7 @@ def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str])
     ).join(
         Location, SalesTransaction.location_id == Location.id
     ).filter(
-        SalesTransaction.location_id.in_(location_ids),
+        *scope,
         SalesTransaction.payment_status == "COMPLETED",
     ).group_by(
         SalesTransaction.location_id, tx_date_col, SalesTransaction.tender_type
@@ -96,7 +108,7 @@ def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str])
     ).join(
         Location, SalesTransaction.location_id == Location.id
     ).filter(
-        SalesTransaction.location_id.in_(location_ids),
+        *scope,
         SalesTransaction.payment_status == "COMPLETED",
     ).group_by(
         SalesTransaction.location_id, tx_date_col, hour_col
@@ -117,7 +129,7 @@ def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str])
     ).join(
         Location, SalesTransaction.location_id == Location.id
     ).filter(
-        SalesTransaction.location_id.in_(location_ids),
+        *scope,
         SalesTransaction.payment_status == "COMPLETED",
         SalesTransaction.line_items.isnot(None),
     ).yield_per(5000).all()
@@ -158,7 +170,7 @@ def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str])
     ).join(
         Location, SalesTransaction.location_id == Location.id
     ).filter(
-        SalesTransaction.location_id.in_(location_ids),
+        *scope,
         text("jsonb_array_length(coalesce(raw_data->'returns', '[]'::jsonb)) > 0"),
     ).yield_per(5000).all()
 
@@ -181,9 +193,12 @@ def rebuild_daily_summaries_for_locations(db: Session, location_ids: List[str])
             buckets[key]["total_refund_amount"] += total_money
 
     # Step 6: Delete old and insert new
-    db.query(DailySalesSummary).filter(
+    stale = db.query(DailySalesSummary).filter(
         DailySalesSummary.location_id.in_(location_ids)
-    ).delete(synchronize_session=False)
+    )
+    if since is not None:
+        stale = stale.filter(DailySalesSummary.date >= since)
+    stale.delete(synchronize_session=False)
 
     created = 0
     for (loc_id, tx_date), b in buckets.items():
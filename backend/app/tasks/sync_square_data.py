@@ -1,8 +1,9 @@
 """
 Celery tasks for Square data synchronization
 """
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from celery.exceptions import SoftTimeLimitExceeded
@@ -26,6 +27,27 @@ def get_celery_db():
     return SessionLocal()
 
 
+# (year, month) pairs whose sales_transactions partition this worker has
+# already ensured, so the DB round-trip happens once per month per process
+_ensured_sales_partitions: set[tuple[int, int]] = set()
+
+
+def ensure_sales_partition(db: Session, ts: datetime) -> None:
+    """
+    Make sure the monthly sales_transactions partition for ts exists.
+    The SQL function serialises concurrent workers on an advisory lock and
+    moves any rows already in the DEFAULT partition into the new month.
+    """
+    utc_ts = ts.astimezone(timezone.utc)
+    key = (utc_ts.year, utc_ts.month)
+    if key in _ensured_sales_partitions:
+        return
+    db.execute(text("SELECT ensure_sales_partition(:ts)"), {"ts": utc_ts})
+    # Commit straight away so the DDL lock on the parent table is released
+    db.commit()
+    _ensured_sales_partitions.add(key)
+
+
 def parse_and_store_order(db: Session, order: Dict[str, Any], locations: List[Location]) -> tuple[bool, bool]:
     """
     Parse Square order data (with line items) and store in sales_transactions table
@@ -41,9 +63,15 @@ def parse_and_store_order(db: Session, order: Dict[str, Any], locations: List[Lo
     try:
         order_id = order.get("id")
 
-        # Check if already exists (duplicate check)
+        # Parse datetime with timezone
+        created_at_str = order.get("created_at", "")
+        transaction_date = datetime.fromisoformat(created_at_str.replace("Z", "+00:00"))
+
+        # Check if already exists (duplicate check). An order's created_at never
+        # changes, so matching on it too prunes the lookup to one month partition
         existing = db.query(SalesTransaction).filter(
-            SalesTransaction.square_transaction_id == order_id
+            SalesTransaction.square_transaction_id == order_id,
+            SalesTransaction.transaction_date == transaction_date,
         ).first()
 
         # Find the matching location
@@ -54,10 +82,6 @@ def parse_and_store_order(db: Session, order: Dict[str, Any], locations: List[Lo
             logger.warning("Location not found for order %s, location_id: %s", order_id, location_id)
             return (False, False)  # Not stored, not duplicate (error)
 
-        # Parse datetime with timezone
-        created_at_str = order.get("created_at", "")
-        transaction_date = datetime.fromisoformat(created_at_str.replace("Z", "+00:00"))
-
         # Extract money amounts
         total_money = order.get("total_money", {})
         net_amounts = order.get("net_amounts", {})
@@ -127,6 +151,7 @@ def parse_and_store_order(db: Session, order: Dict[str, Any], locations: List[Lo
             return (False, True)  # No changes, skip
 
         # Create transaction record
+        ensure_sales_partition(db, transaction_date)
         transaction = SalesTransaction(
             location_id=location.id,
             square_transaction_id=order_id,
@@ -343,12 +368,18 @@ def sync_square_payments(self, account_id: str, location_ids: Optional[List[str]
         account.last_sync_at = end_time
         db.commit()
 
-        # Rebuild daily sales summaries if anything changed
+        # Rebuild daily sales summaries if anything changed, starting from the
+        # oldest order written by this run (rows stored/updated after end_time)
         if total_synced > 0 or total_updated > 0:
             try:
                 from app.services.summary_service import rebuild_daily_summaries_for_locations
                 loc_ids = [str(loc.id) for loc in locations]
-                summaries = rebuild_daily_summaries_for_locations(db, loc_ids)
+                oldest_touched = db.query(func.min(SalesTransaction.transaction_date)).filter(
+                    SalesTransaction.location_id.in_([loc.id for loc in locations]),
+                    SalesTransaction.updated_at >= end_time,
+                ).scalar()
+                since = oldest_touched.date() - timedelta(days=1) if oldest_touched else None
+                summaries = rebuild_daily_summaries_for_locations(db, loc_ids, since=since)
                 logger.info("Rebuilt %d daily summaries after sync", summaries)
             except Exception as e:
                 logger.warning("Failed to rebuild daily summaries: %s", e)
@@ -555,6 +586,12 @@ def sync_all_active_accounts():
     db = get_celery_db()
 
     try:
+        # Create this month's and next month's sales partitions ahead of the
+        # syncs, so new orders rarely reach the DEFAULT partition
+        now = datetime.now(timezone.utc)
+        ensure_sales_partition(db, now)
+        ensure_sales_partition(db, (now.replace(day=1) + timedelta(days=32)).replace(day=1))
+
         # Get all active Square accounts
         accounts = db.query(SquareAccount).filter(
             SquareAccount.is_active == True
@@ -683,7 +720,9 @@ def import_square_orders_task(self, import_id: str):
             try:
                 from app.services.summary_service import rebuild_daily_summaries_for_locations
                 loc_ids = [str(loc.id) for loc in locations]
-                summaries = rebuild_daily_summaries_for_locations(db, loc_ids)
+                summaries = rebuild_daily_summaries_for_locations(
+                    db, loc_ids, since=data_import.start_date - timedelta(days=1)
+                )
                 logger.info("Rebuilt %d daily summaries after import", summaries)
             except Exception as e:
                 logger.warning("Failed to rebuild daily summaries: %s", e)
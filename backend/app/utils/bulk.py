@@ -0,0 +1,45 @@
+"""
+Bulk loading helpers built on PostgreSQL COPY.
+COPY streams all rows in one statement, avoiding the per-statement
+round trips of executemany / multi-row INSERT for large seeds.
+"""
+import io
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy.orm import Session
+
+
+def _copy_text(value: Any) -> str:
+    """Encode one value for COPY's text format (tab-separated, \\N for NULL)."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(db: Session, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+    """
+    COPY rows into table on the session's connection (and transaction).
+
+    Args:
+        db: Database session
+        table: Target table name (trusted, not user input)
+        columns: Column names matching the order of each row
+        rows: Iterable of row tuples
+    """
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_text(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+    finally:
+        cursor.close()
@@ -0,0 +1,103 @@
+"""
+Redis-backed JSON cache for small, short-lived lookups.
+Redis errors are logged and treated as cache misses, so an unavailable
+Redis slows requests down rather than failing them.
+"""
+import logging
+from typing import Any, Callable, Optional
+
+import orjson
+import redis
+from pydantic import BaseModel
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached API response is served before it is rebuilt
+RESPONSE_CACHE_TTL = 60
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Shared Redis client (connection-pooled, created on first use)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+    return _client
+
+
+def cache_get(key: str) -> Optional[Any]:
+    """Return the cached JSON value for key, or None on a miss or Redis error."""
+    try:
+        raw = get_redis().get(key)
+    except redis.RedisError as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+    return orjson.loads(raw) if raw is not None else None
+
+
+def cache_set(key: str, value: Any, ttl: int) -> None:
+    """Store a JSON-serialisable value under key for ttl seconds."""
+    try:
+        get_redis().set(key, orjson.dumps(value), ex=ttl)
+    except redis.RedisError as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+
+def cache_delete(*keys: str) -> None:
+    """Drop keys from the cache."""
+    if not keys:
+        return
+    try:
+        get_redis().delete(*keys)
+    except redis.RedisError as e:
+        logger.warning("Cache invalidation failed for %s: %s", keys, e)
+
+
+def org_cache_version(organization_id) -> int:
+    """Current version of an organization's cached responses (0 if unset or unreachable)."""
+    try:
+        raw = get_redis().get(f"org_cache_version:{organization_id}")
+    except redis.RedisError as e:
+        logger.warning("Cache version read failed for %s: %s", organization_id, e)
+        return 0
+    return int(raw) if raw is not None else 0
+
+
+def bump_org_cache_version(organization_id) -> None:
+    """
+    Invalidate every cached response of an organization at once. Keys embed
+    the version, so old entries are never read again and expire on their TTL.
+    """
+    try:
+        get_redis().incr(f"org_cache_version:{organization_id}")
+    except redis.RedisError as e:
+        logger.warning("Cache version bump failed for %s: %s", organization_id, e)
+
+
+def org_response_key(organization_id, *parts) -> str:
+    """Build a response cache key scoped to the organization's current version."""
+    version = org_cache_version(organization_id)
+    return ":".join(["response", str(organization_id), f"v{version}", *(str(p) for p in parts)])
+
+
+def cached_response(key: str, build: Callable[[], Any], ttl: int = RESPONSE_CACHE_TTL) -> Any:
+    """
+    Return the cached JSON response for key, or call build() and cache its
+    result. Pydantic models are stored in their JSON form; FastAPI validates
+    a cached dict against the route's response_model as usual.
+    """
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
+    value = build()
+    payload = value.model_dump(mode="json") if isinstance(value, BaseModel) else value
+    cache_set(key, payload, ttl)
+    return value
@@ -0,0 +1,41 @@
+"""
+Concurrent index helpers for Alembic revision scripts that index existing,
+populated tables.
+"""
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import context, op
+
+
+def create_index_concurrently(name: str, table: str, columns: Sequence[str], unique: bool = False) -> None:
+    """
+    CREATE INDEX CONCURRENTLY outside the migration transaction, so writes to
+    the table aren't blocked while it builds.
+
+    A concurrent build that fails part-way leaves an INVALID index behind
+    (which IF NOT EXISTS would then skip), so the result is checked in
+    pg_index and the migration fails instead of continuing without it.
+    Only for new revisions on existing, populated tables; tables a revision
+    creates itself are empty and take a plain op.create_index().
+    """
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} ({', '.join(columns)})"
+        )
+    # No connection to query when rendering SQL with `alembic upgrade --sql`
+    if context.is_offline_mode():
+        return
+    is_valid = op.get_bind().execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": name},
+    ).scalar()
+    if not is_valid:
+        raise RuntimeError(f"Index {name} is missing or INVALID; DROP INDEX CONCURRENTLY {name} and re-run")
+
+
+def drop_index_concurrently(name: str) -> None:
+    """DROP INDEX CONCURRENTLY IF EXISTS outside the migration transaction."""
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
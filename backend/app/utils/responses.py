@@ -0,0 +1,39 @@
+"""
+Default JSON response class for the API, serialised with orjson, and
+ETag helpers for conditional GETs on polled endpoints.
+"""
+import hashlib
+from typing import Any, Optional
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """
+    ORJSONResponse that also accepts non-string dict keys.
+
+    Several report endpoints return dicts keyed by int (hour of day etc.);
+    the stdlib encoder stringifies those and orjson rejects them by default.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def etag_for(*parts: Any) -> str:
+    """Weak ETag built from a fingerprint of whatever the response depends on."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    Return a 304 response if the client's If-None-Match already holds etag,
+    otherwise None so the caller builds the full response.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
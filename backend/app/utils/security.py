@@ -2,7 +2,7 @@
 Security utilities for password hashing and JWT tokens
 """
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
@@ -39,6 +39,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if its hash uses deprecated settings, rehash it
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password to compare against
+
+    Returns:
+        Tuple of (matches, new_hash); new_hash is None unless it should be stored
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def dummy_verify_password() -> None:
+    """
+    Spend the same time as a real verify without a hash to check against
+
+    Used when no user matches, so response times don't reveal which emails exist.
+    """
+    pwd_context.dummy_verify()
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
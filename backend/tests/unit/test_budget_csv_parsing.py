@@ -0,0 +1,58 @@
+"""
+Unit tests for the budget CSV cell parsers.
+"""
+from datetime import date
+
+import pytest
+
+from app.api.v1.budgets import _parse_amount_pence, _parse_budget_date
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2026-03-05", date(2026, 3, 5)),
+    ("05/03/2026", date(2026, 3, 5)),
+    ("5/3/2026", date(2026, 3, 5)),
+    ("31/12/2025", date(2025, 12, 31)),
+])
+def test_parse_budget_date(value, expected):
+    assert _parse_budget_date(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "not a date",
+    "2026-13-01",
+    "31/02/2026",
+    "03/2026",
+    "05/03/2026/1",
+    "05-03-2026",
+])
+def test_parse_budget_date_rejects_invalid(value):
+    assert _parse_budget_date(value) is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("12", 1200),
+    ("12.5", 1250),
+    ("12.34", 1234),
+    (" 12.34 ", 1234),
+    ("1,234.56", 123456),
+    ("1,234,567", 123456700),
+    ("-5", -500),
+])
+def test_parse_amount_pence(value, expected):
+    assert _parse_amount_pence(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "abc",
+    "£12.00",
+    "12 GBP",
+    "1 234,56",
+    "inf",
+    "-inf",
+    "nan",
+])
+def test_parse_amount_pence_rejects_invalid(value):
+    assert _parse_amount_pence(value) is None
@@ -0,0 +1,44 @@
+"""
+Unit tests for the budgets list keyset cursor.
+"""
+import base64
+import uuid
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.budgets import _decode_cursor, _encode_cursor
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def test_cursor_round_trip():
+    budget = SimpleNamespace(date=date(2026, 3, 5), id=uuid.uuid4())
+    assert _decode_cursor(_encode_cursor(budget)) == (budget.date, budget.id)
+
+
+def test_cursor_is_url_safe():
+    budget = SimpleNamespace(date=date(2026, 3, 5), id=uuid.uuid4())
+    cursor = _encode_cursor(budget)
+    assert "+" not in cursor
+    assert "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not-base64!",
+    _b64(b"garbage"),
+    _b64(b"\xff\xfe\xfd"),
+    _b64(b"2026-03-05"),
+    _b64(b"2026-03-05|not-a-uuid"),
+    _b64(b"2026-13-05|12345678-1234-5678-1234-567812345678"),
+    _b64(b"2026-03-05|12345678-1234-5678-1234-567812345678|extra"),
+])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(HTTPException) as exc:
+        _decode_cursor(cursor)
+    assert exc.value.status_code == 400
@@ -0,0 +1,41 @@
+"""
+Unit tests for the COPY text-format encoding in app.utils.bulk.
+"""
+import uuid
+
+import pytest
+
+from app.utils.bulk import _copy_text
+
+
+def test_copy_text_null():
+    assert _copy_text(None) == "\\N"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("plain", "plain"),
+    ("a\tb", "a\\tb"),
+    ("a\nb", "a\\nb"),
+    ("a\r\nb", "a\\r\\nb"),
+    ("C:\\path", "C:\\\\path"),
+    # The literal text \N must not be read back as NULL
+    ("\\N", "\\\\N"),
+    # Backslashes are escaped first so the escapes they introduce aren't doubled
+    ("\\\t", "\\\\\\t"),
+])
+def test_copy_text_escapes_special_characters(value, expected):
+    assert _copy_text(value) == expected
+
+
+def test_copy_text_stringifies_values():
+    value = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    assert _copy_text(value) == "12345678-1234-5678-1234-567812345678"
+    assert _copy_text(42) == "42"
+    assert _copy_text(True) == "True"
+
+
+def test_copy_text_output_has_no_raw_delimiters():
+    encoded = _copy_text("one\ttwo\nthree\rfour")
+    assert "\t" not in encoded
+    assert "\n" not in encoded
+    assert "\r" not in encoded